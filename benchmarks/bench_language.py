@@ -0,0 +1,103 @@
+"""Compare the n-gram detector in src/language.py with plain langdetect.
+
+Usage: python benchmarks/bench_language.py [--repeat N]
+
+Reports cold-start cost, per-text latency for langdetect, the single-text
+path (detect_language_with_confidence) and the batch path (detect_many),
+plus how often the n-gram model agrees with langdetect and with the
+expected labels of the sample corpus.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import langdetect  # noqa: E402
+
+from src import language  # noqa: E402
+
+SAMPLES: list[tuple[str, str]] = [
+    ("Hello, how are you doing today?", "en"),
+    ("I think we should meet tomorrow", "en"),
+    ("where are you going tonight", "en"),
+    ("the weather is nice", "en"),
+    ("Can you send me the file before lunch?", "en"),
+    ("Bonjour tout le monde, comment ça va", "fr"),
+    ("Nous allons au cinéma ce soir", "fr"),
+    ("Je voudrais un café, s'il vous plaît", "fr"),
+    ("Wie geht es dir heute", "de"),
+    ("Vielen Dank für Ihre Hilfe", "de"),
+    ("Ich habe keine Zeit", "de"),
+    ("¿Dónde está la biblioteca?", "es"),
+    ("Me gustaría reservar una mesa para dos", "es"),
+    ("Questo è un bel giorno", "it"),
+    ("Non vedo l'ora di vederti domani", "it"),
+    ("Olá, tudo bem com você", "pt"),
+    ("Obrigado pela ajuda de ontem", "pt"),
+    ("Dit is een mooie dag", "nl"),
+    ("Ik ga morgen naar de markt", "nl"),
+    ("Jag älskar dig", "sv"),
+    ("Dzień dobry, jak się masz", "pl"),
+    ("Merhaba nasılsın", "tr"),
+    ("Xin chào, bạn khỏe không", "vi"),
+    ("Kiitos paljon avusta", "fi"),
+    ("Selamat pagi, apa kabar", "id"),
+    ("Dobrý den, jak se máte", "cs"),
+]
+
+
+def _time_per_text(fn, texts: list[str]) -> float:
+    start = time.perf_counter()
+    for text in texts:
+        fn(text)
+    return (time.perf_counter() - start) / len(texts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=40, help="copies of the corpus per run")
+    args = parser.parse_args()
+
+    if language.np is None:
+        sys.exit("NumPy is not installed; the n-gram detector is unavailable.")
+
+    texts = [text for text, _ in SAMPLES]
+    expected = [lang for _, lang in SAMPLES]
+    # Distinct strings so the lru_cache on the single-text path never hits.
+    corpus = [f"{text} {i}" for i in range(args.repeat) for text in texts]
+
+    langdetect.DetectorFactory.seed = 0
+    start = time.perf_counter()
+    langdetect.detect("warm up")
+    langdetect_cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    language.warm_up_detector()
+    ngram_cold = time.perf_counter() - start
+
+    single = language.detect_language_with_confidence.__wrapped__
+    langdetect_per = _time_per_text(langdetect.detect, corpus)
+    single_per = _time_per_text(single, corpus)
+    start = time.perf_counter()
+    language.detect_many(corpus)
+    batch_per = (time.perf_counter() - start) / len(corpus)
+
+    ours = [lang for lang, _ in language.detect_many(texts)]
+    theirs = [language._normalise(langdetect.detect(text)) for text in texts]
+    n = len(texts)
+
+    print(f"texts per run        {len(corpus)}")
+    print(f"cold start           langdetect {langdetect_cold * 1e3:7.1f} ms   n-gram {ngram_cold * 1e3:7.1f} ms")
+    print(f"langdetect           {langdetect_per * 1e6:9.1f} us/text")
+    print(f"n-gram single        {single_per * 1e6:9.1f} us/text   x{langdetect_per / single_per:.1f}")
+    print(f"n-gram detect_many   {batch_per * 1e6:9.1f} us/text   x{langdetect_per / batch_per:.1f}")
+    print(f"accuracy             langdetect {sum(a == b for a, b in zip(theirs, expected))}/{n}"
+          f"   n-gram {sum(a == b for a, b in zip(ours, expected))}/{n}")
+    print(f"agreement            {sum(a == b for a, b in zip(ours, theirs))}/{n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Microbenchmarks for content protection and restoration.
+
+Usage: python benchmarks/bench_protect.py [--number N]
+
+Times _protect_content and _restore_content against the previous
+implementation (two substitution passes, one str.replace per placeholder)
+on plain, link-heavy, emoji-heavy and mixed messages.
+"""
+
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.translation import (  # noqa: E402
+    EMOJI_PATTERN,
+    _URL_PATTERN,
+    _protect_content,
+    _restore_content,
+)
+
+
+def _legacy_protect(text: str) -> tuple[str, dict[str, str]]:
+    placeholders: dict[str, str] = {}
+
+    def _replace(prefix: str):
+        def _sub(match: re.Match) -> str:
+            key = f"__{prefix}{len(placeholders)}__"
+            placeholders[key] = match.group(0)
+            return key
+        return _sub
+
+    protected = _URL_PATTERN.sub(_replace("URL"), text)
+    protected = EMOJI_PATTERN.sub(_replace("EMJ"), protected)
+    return protected, placeholders
+
+
+def _legacy_restore(text: str, placeholders: dict[str, str]) -> str:
+    for key, value in placeholders.items():
+        text = text.replace(key, value)
+    return text
+
+
+MESSAGES: dict[str, str] = {
+    "plain": "今天的会议改到下午三点，大家记得带上周的报告。 " * 8,
+    "links": " ".join(f"see https://example.com/page/{i}?ref=abc" for i in range(60)),
+    "emoji": " ".join(f"word{i} 😀 🎉" for i in range(150)),
+    "mixed": (
+        "Hey @alice_dev the fix is in `utils.py` #release 🚀 https://github.com/org/repo/pull/1 "
+        "```\nprint('hello')\n``` thanks 🙏 "
+    ) * 20,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000, help="calls per measurement")
+    args = parser.parse_args()
+
+    print(f"{'message':8} {'chars':>6} {'spans':>6}  {'protect us':>20}  {'restore us':>20}")
+    for name, text in MESSAGES.items():
+        protected, placeholders = _protect_content(text)
+        legacy_protected, legacy_placeholders = _legacy_protect(text)
+        assert _restore_content(protected, placeholders) == text
+
+        def per_call(stmt) -> float:
+            return min(timeit.repeat(stmt, number=args.number, repeat=3)) / args.number * 1e6
+
+        new_protect = per_call(lambda: _protect_content(text))
+        old_protect = per_call(lambda: _legacy_protect(text))
+        new_restore = per_call(lambda: _restore_content(protected, placeholders))
+        old_restore = per_call(lambda: _legacy_restore(legacy_protected, legacy_placeholders))
+        print(
+            f"{name:8} {len(text):>6} {len(placeholders):>6}  "
+            f"{old_protect:8.1f} -> {new_protect:8.1f}  {old_restore:8.1f} -> {new_restore:8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Offline microbenchmark suite for the hot paths.
+
+Usage:
+    python benchmarks/bench_suite.py [--quick] [--filter TEXT] [--number N]
+                                     [--save FILE] [--compare FILE] [--threshold X]
+
+Runs without network or Telegram in a throwaway working directory (its own
+config.json and vocab.db). For every case it reports the best per-call time
+over three repeats and, from a separate tracemalloc pass, the peak memory a
+call allocates and how much of it stays allocated afterwards.
+
+Cases: _protect_content/_restore_content, language detection on chat
+samples, _build_prompt, load_config, and add_word, review_word,
+get_due_words, generate_quiz and check_writing on synthetic decks of
+1k/10k/100k words (--quick stops at 10k).
+
+--save writes the results as a baseline; --compare reads one and flags
+every case whose time or peak allocation grew by more than --threshold
+(default 1.25x), exiting with status 1 if any did.
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from typing import Any, Callable
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, _ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_language import SAMPLES  # noqa: E402
+from bench_protect import MESSAGES  # noqa: E402
+
+Case = tuple[str, Callable[[], Any]]
+
+_VOCAB_OPS = ("add_word", "review_word", "get_due_words", "generate_quiz", "check_writing")
+_KANA = "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわん"
+
+
+def _measure(fn: Callable[[], Any], number: int) -> dict[str, float]:
+    fn()  # warm caches and lazy initialisation
+    seconds = min(timeit.repeat(fn, number=number, repeat=3)) / number
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"us": seconds * 1e6, "peak_kb": (peak - before) / 1024, "retained_b": max(after - before, 0)}
+
+
+def _text_cases() -> list[Case]:
+    from src.config import load_config
+    from src.language import detect_language, detect_language_with_confidence, warm_up_detector
+    from src.translation import _build_prompt, _protect_content, _restore_content
+
+    warm_up_detector()
+    cases: list[Case] = []
+    for name, text in MESSAGES.items():
+        protected, placeholders = _protect_content(text)
+        cases.append((f"protect/{name}", lambda t=text: _protect_content(t)))
+        cases.append((f"restore/{name}", lambda p=protected, ph=placeholders: _restore_content(p, ph)))
+
+    # The uncached path on distinct chat lines, then the lru_cache hit path.
+    texts = [f"{text} {i}" for i in range(20) for text, _ in SAMPLES]
+    rotation = iter(range(10 ** 9))
+    uncached = detect_language_with_confidence.__wrapped__
+    cases.append(("detect/uncached", lambda: uncached(texts[next(rotation) % len(texts)])))
+    cases.append(("detect/cached", lambda: detect_language(SAMPLES[0][0])))
+
+    cases.append(("build_prompt/en", lambda: _build_prompt(MESSAGES["mixed"], "en")))
+    cases.append(("build_prompt/ja", lambda: _build_prompt(MESSAGES["plain"], "ja")))
+    cases.append(("load_config", load_config))
+    return cases
+
+
+def _random_word(rng: random.Random, lang: str) -> str:
+    alphabet = _KANA if lang == "ja" else string.ascii_lowercase
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(3, 9)))
+
+
+def _build_deck(size: int, workdir: str) -> Any:
+    """Fresh vocab module state backed by its own SQLite file with *size* words."""
+    from src import vocab
+
+    if vocab._storage is not None:
+        vocab._storage.flush()
+    vocab._storage = None
+    vocab._words = None
+    path = os.path.join(workdir, f"vocab_{size}.db")
+    with open(os.path.join(workdir, "config.json"), "w", encoding="utf-8") as f:
+        json.dump({"vocab": {"backend": "sqlite", "path": path}}, f)
+
+    rng = random.Random(size)
+    ids = []
+    for _ in range(size):
+        lang = "ja" if rng.random() < 0.3 else "en"
+        ids.append(vocab.add_word(_random_word(rng, lang), _random_word(rng, "en"), lang=lang)["id"])
+    for word_id in ids[: size // 3]:
+        vocab.review_word(word_id, 4)
+    return vocab, ids, rng
+
+
+def _vocab_cases(size: int, workdir: str) -> list[Case]:
+    from src import config
+
+    start = time.perf_counter()
+    config._snapshot = None  # pick up the per-deck config.json
+    vocab, ids, rng = _build_deck(size, workdir)
+    print(f"  (deck {size}: built in {time.perf_counter() - start:.1f}s)", file=sys.stderr)
+    probe = vocab.get_word(ids[len(ids) // 2])["word"]
+    typo = probe[:-1] + ("x" if probe[-1] != "x" else "y")
+    label = f"{size // 1000}k"
+    return [
+        (f"vocab/{label}/add_word", lambda: vocab.add_word(_random_word(rng, "en"), "t", lang="en")),
+        (f"vocab/{label}/review_word", lambda: vocab.review_word(rng.choice(ids), rng.randint(0, 5))),
+        (f"vocab/{label}/get_due_words", lambda: vocab.get_due_words(20)),
+        (f"vocab/{label}/generate_quiz", lambda: vocab.generate_quiz(5, weak_bias=1.0)),
+        (f"vocab/{label}/check_writing", lambda: vocab.check_writing(typo, "en")),
+    ]
+
+
+def _compare(results: dict[str, dict[str, float]], baseline_path: str, threshold: float) -> int:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = 0
+    print(f"\n{'case':34} {'time':>22} {'peak KB':>22}")
+    for name, now in results.items():
+        old = baseline.get(name)
+        if old is None:
+            print(f"{name:34} {'(new)':>22}")
+            continue
+        slower = now["us"] > old["us"] * threshold
+        # Ignore allocation noise below 1 KB.
+        heavier = now["peak_kb"] > max(old["peak_kb"] * threshold, old["peak_kb"] + 1)
+        flag = "  REGRESSION" if slower or heavier else ""
+        regressions += bool(flag)
+        print(
+            f"{name:34} {old['us']:9.1f} -> {now['us']:9.1f}  "
+            f"{old['peak_kb']:9.1f} -> {now['peak_kb']:9.1f}{flag}"
+        )
+    print(f"\n{regressions} regression(s) at threshold x{threshold}")
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200, help="calls per timing repeat")
+    parser.add_argument("--quick", action="store_true", help="skip the 100k-word deck")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--save", metavar="FILE", help="write results as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=1.25, help="allowed slowdown factor")
+    args = parser.parse_args()
+
+    save_path = os.path.abspath(args.save) if args.save else None
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+    results: dict[str, dict[str, float]] = {}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        sizes = [1_000, 10_000] if args.quick else [1_000, 10_000, 100_000]
+        groups: list[Callable[[], list[Case]]] = [_text_cases]
+        groups += [
+            lambda s=size: _vocab_cases(s, workdir) for size in sizes
+            if not args.filter
+            or any(args.filter in f"vocab/{size // 1000}k/{op}" for op in _VOCAB_OPS)
+        ]
+
+        print(f"{'case':34} {'us/call':>10} {'peak KB':>10} {'retained B':>11}")
+        for group in groups:
+            for name, fn in group():
+                if args.filter and args.filter not in name:
+                    continue
+                # Vocab writes grow the deck, so they get fewer calls.
+                number = max(1, args.number // 10) if name.endswith(("add_word", "review_word")) else args.number
+                results[name] = r = _measure(fn, number)
+                print(f"{name:34} {r['us']:10.1f} {r['peak_kb']:10.1f} {r['retained_b']:11.0f}")
+
+        from src import vocab
+        if vocab._storage is not None:
+            vocab._storage.flush()
+
+    if save_path:
+        with open(save_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline written to {save_path}")
+    if compare_path:
+        sys.exit(_compare(results, compare_path, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
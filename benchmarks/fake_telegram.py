@@ -0,0 +1,64 @@
+"""Stand-ins for the Pyrogram objects the translation handlers touch.
+
+FakeMessage records every edit_text, reply_text and delete call with a
+monotonic timestamp, so a harness can tell when the loading placeholder and
+the final translation landed. An optional edit latency simulates the
+Telegram round trip.
+"""
+
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+_message_ids = itertools.count(1)
+
+
+@dataclass
+class FakeChat:
+    id: int
+
+
+@dataclass
+class FakeCall:
+    at: float
+    method: str
+    text: str = ""
+    kwargs: dict[str, Any] = field(default_factory=dict)
+
+
+class FakeMessage:
+    def __init__(self, text: str, chat_id: int = 1, edit_latency: float = 0.0) -> None:
+        self.id = next(_message_ids)
+        self.chat = FakeChat(chat_id)
+        self.text = text
+        self.reply_to_message = None
+        self.matches: list[Any] = []
+        self.edit_latency = edit_latency
+        self.calls: list[FakeCall] = []
+        self.replies: list["FakeMessage"] = []
+        self.deleted = False
+
+    async def edit_text(self, text: str, **kwargs: Any) -> "FakeMessage":
+        if self.edit_latency:
+            await asyncio.sleep(self.edit_latency)
+        self.calls.append(FakeCall(time.monotonic(), "edit_text", text, kwargs))
+        self.text = text
+        return self
+
+    async def reply_text(self, text: str, **kwargs: Any) -> "FakeMessage":
+        if self.edit_latency:
+            await asyncio.sleep(self.edit_latency)
+        self.calls.append(FakeCall(time.monotonic(), "reply_text", text, kwargs))
+        reply = FakeMessage(text, self.chat.id, self.edit_latency)
+        self.replies.append(reply)
+        return reply
+
+    async def delete(self) -> None:
+        self.calls.append(FakeCall(time.monotonic(), "delete"))
+        self.deleted = True
+
+    @property
+    def edits(self) -> list[FakeCall]:
+        return [c for c in self.calls if c.method == "edit_text"]
@@ -0,0 +1,221 @@
+"""End-to-end load replay through the translation handlers.
+
+Usage:
+    python benchmarks/replay.py [--rate 5] [--count 100] [--chats 10]
+                                [--auto-ratio 0.5] [--long-ratio 0.05]
+                                [--input stream.jsonl] [--speed 1.0]
+                                [--base-url URL] [stub options...]
+
+Messages are FakeMessages (benchmarks/fake_telegram.py) fed to
+do_translate_and_edit (explicit .t commands) or auto_translate_handler,
+at a fixed rate (--poisson for exponential gaps) or on the timestamps of a
+recorded stream. Everything runs offline: the only engine is an
+OpenAI-compatible custom engine "stub", served in-process by
+benchmarks/stub_openai.py unless --base-url points elsewhere. The real edit
+scheduler, admission limiter, cache, chunking and single-flight all stay
+in the path.
+
+A recorded stream is JSONL, one message per line:
+    {"at": 0.0, "chat_id": 3, "text": "...", "kind": "auto" | "command", "targets": "en"}
+where "at" is seconds from the start and "targets" is used by commands.
+
+Reported per kind: end-to-end latency percentiles (dispatch to handler
+return, i.e. the final edit has landed), time to first edit, throughput,
+and how many messages ended in an error.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from typing import Any
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stub_openai  # noqa: E402
+from bench_language import SAMPLES  # noqa: E402
+from bench_protect import MESSAGES  # noqa: E402
+from fake_telegram import FakeMessage  # noqa: E402
+
+_ERROR_MARKERS = ("翻译失败", "系统异常")
+
+
+def synthetic_stream(
+    count: int, rate: float, chats: int, auto_ratio: float, long_ratio: float, poisson: bool, seed: int,
+) -> list[dict[str, Any]]:
+    rng = random.Random(seed)
+    short = [text for text, _ in SAMPLES] + [MESSAGES["mixed"][:300], MESSAGES["links"][:400]]
+    long_text = (MESSAGES["plain"] + "\n\n") * 6
+    stream, at = [], 0.0
+    for i in range(count):
+        text = long_text if rng.random() < long_ratio else rng.choice(short)
+        stream.append({
+            "at": at,
+            "chat_id": rng.randrange(chats),
+            # A counter suffix keeps most texts distinct, like real chat.
+            "text": f"{text} #{i}" if rng.random() < 0.8 else text,
+            "kind": "auto" if rng.random() < auto_ratio else "command",
+            "targets": rng.choice(["en", "ja", "en,ja"]),
+        })
+        at += rng.expovariate(rate) if poisson else 1 / rate
+    return stream
+
+
+def load_stream(path: str) -> list[dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        stream = [json.loads(line) for line in f if line.strip()]
+    return sorted(stream, key=lambda m: m.get("at", 0.0))
+
+
+def _write_config(base_url: str, args: argparse.Namespace) -> None:
+    config = {
+        "engine": "stub",
+        "home_lang": "zh-CN",
+        "default_lang": "ja",
+        "auto_cmd": args.auto_cmd,
+        "custom_engines": {"stub": {"base_url": base_url, "api_key": "sk-stub", "model": "stub-model"}},
+        "api_keys": {"openai": "", "gemini": ""},
+        "stream": {"enabled": not args.no_stream, "edit_interval": 1.5},
+        "edits": {"per_chat_interval": args.per_chat_interval, "global_rate": 20},
+        "cache": {"enabled": not args.no_cache, "disk_path": "translations.db"},
+        # Fallback engines must not reach the network: port 9 refuses at once.
+        "google": {"base_url": "http://127.0.0.1:9"},
+    }
+    with open("config.json", "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+
+def _pct(values: list[float], q: float) -> float:
+    from src.utils import percentile
+    return percentile(values, q)
+
+
+async def replay(stream: list[dict[str, Any]], speed: float, edit_latency: float) -> list[dict[str, Any]]:
+    from src.handlers import auto_translate_handler, do_translate_and_edit
+    from src.language import warm_up_detector
+
+    warm_up_detector()
+    outcomes: list[dict[str, Any]] = []
+
+    async def one(entry: dict[str, Any]) -> None:
+        message = FakeMessage(entry["text"], entry.get("chat_id", 0), edit_latency)
+        kind = entry.get("kind", "command")
+        start = time.monotonic()
+        if kind == "auto":
+            await auto_translate_handler(None, message)
+        else:
+            await do_translate_and_edit(message, entry["text"], entry.get("targets", "en"), mode="append")
+        end = time.monotonic()
+        edits = message.edits
+        outcomes.append({
+            "kind": kind,
+            "latency": end - start,
+            "first_edit": edits[0].at - start if edits else None,
+            "edits": len(edits),
+            "skipped": not edits,
+            "error": any(marker in c.text for c in message.calls for marker in _ERROR_MARKERS),
+        })
+
+    start = time.monotonic()
+    tasks = []
+    for entry in stream:
+        delay = start + entry.get("at", 0.0) / speed - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(entry)))
+    await asyncio.gather(*tasks)
+    return outcomes
+
+
+def report(outcomes: list[dict[str, Any]], elapsed: float, stub_stats: dict[str, int] | None) -> None:
+    from src.edits import get_edit_scheduler
+    from src.translation import admission_stats, inflight_stats
+
+    print(f"{'kind':8} {'n':>5} {'done':>5} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'max ms':>8} {'1st edit p50':>13}")
+    for kind in ("command", "auto", "all"):
+        rows = [o for o in outcomes if kind == "all" or o["kind"] == kind]
+        if not rows:
+            continue
+        done = [o for o in rows if not o["skipped"]]
+        latencies = [o["latency"] for o in done]
+        first = [o["first_edit"] for o in done if o["first_edit"] is not None]
+        print(
+            f"{kind:8} {len(rows):>5} {len(done):>5} {sum(o['error'] for o in rows):>4} "
+            f"{_pct(latencies, 50) * 1e3:8.0f} {_pct(latencies, 95) * 1e3:8.0f} "
+            f"{_pct(latencies, 99) * 1e3:8.0f} {max(latencies, default=0) * 1e3:8.0f} "
+            f"{_pct(first, 50) * 1e3:13.0f}"
+        )
+    translated = sum(1 for o in outcomes if not o["skipped"])
+    print(f"\nwall time {elapsed:.1f}s · throughput {translated / elapsed:.2f} msg/s "
+          f"({len(outcomes) - translated} skipped as already in the target language)")
+    es = get_edit_scheduler().stats()
+    adm = admission_stats()
+    print(f"edits sent {es['sent']} · coalesced {es['coalesced']} · "
+          f"admission wait p95 {adm['wait_p95'] * 1e3:.0f}ms · coalesced requests {inflight_stats()['coalesced']}")
+    if stub_stats is not None:
+        print(f"stub: {stub_stats}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", help="recorded JSONL stream (default: synthetic)")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor for --input")
+    parser.add_argument("--rate", type=float, default=5.0, help="synthetic messages per second")
+    parser.add_argument("--count", type=int, default=100, help="synthetic messages")
+    parser.add_argument("--chats", type=int, default=10, help="synthetic chats to spread messages over")
+    parser.add_argument("--auto-ratio", type=float, default=0.5, help="share of auto-mode messages")
+    parser.add_argument("--long-ratio", type=float, default=0.05, help="share of long (chunked) messages")
+    parser.add_argument("--poisson", action="store_true", help="exponential inter-arrival gaps")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--auto-cmd", default="swap", help="auto mode for auto messages")
+    parser.add_argument("--no-stream", action="store_true", help="disable streaming edits")
+    parser.add_argument("--no-cache", action="store_true", help="disable the translation cache")
+    parser.add_argument("--per-chat-interval", type=float, default=1.0, help="edit throttle per chat")
+    parser.add_argument("--edit-latency", type=float, default=0.05, help="simulated Telegram edit RTT")
+    parser.add_argument("--base-url", help="use a running OpenAI-compatible server instead of the stub")
+    parser.add_argument("--port", type=int, default=8791, help="port for the in-process stub")
+    parser.add_argument("--latency", type=float, default=0.3, help="stub base latency")
+    parser.add_argument("--jitter", type=float, default=0.2, help="stub latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub 500 probability")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="stub 429 probability")
+    args = parser.parse_args()
+
+    if args.input:
+        stream = load_stream(os.path.abspath(args.input))
+    else:
+        stream = synthetic_stream(
+            args.count, args.rate, args.chats, args.auto_ratio, args.long_ratio, args.poisson, args.seed
+        )
+
+    server = None
+    if args.base_url:
+        base_url = args.base_url
+    else:
+        server = stub_openai.serve(
+            args.port, latency=args.latency, jitter=args.jitter,
+            error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{args.port}/v1"
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        _write_config(base_url, args)
+        print(f"replaying {len(stream)} messages against {base_url}")
+        start = time.monotonic()
+        outcomes = asyncio.run(replay(stream, args.speed, args.edit_latency))
+        elapsed = time.monotonic() - start
+        report(outcomes, elapsed, server.RequestHandlerClass.stats.snapshot() if server else None)
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
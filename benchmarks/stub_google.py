@@ -0,0 +1,81 @@
+"""Local stand-in for the Google Translate endpoint used by the google engine.
+
+Usage: python benchmarks/stub_google.py [--port 8790] [--latency 0.05]
+
+Answers POST/GET /translate_a/t with one "[<tl>] <segment>" item per ``q``
+field, in the same shape as the real endpoint with sl=auto. Point the bot
+at it with "google": {"base_url": "http://127.0.0.1:8790"} in config.json.
+"""
+
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def make_handler(latency: float) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        requests = 0
+
+        def _answer(self, fields: dict[str, list[str]]) -> None:
+            Handler.requests += 1
+            if latency:
+                time.sleep(latency)
+            target = fields.get("tl", ["en"])[0]
+            body = json.dumps(
+                [[f"[{target}] {q}", "auto"] for q in fields.get("q", [])], ensure_ascii=False
+            ).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            url = urlsplit(self.path)
+            if url.path != "/translate_a/t":
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self._answer(parse_qs(url.query))
+
+        def do_POST(self) -> None:
+            url = urlsplit(self.path)
+            length = int(self.headers.get("Content-Length", 0))
+            fields = parse_qs(url.query)
+            fields.update(parse_qs(self.rfile.read(length).decode("utf-8")))
+            self._answer(fields)
+
+        def do_HEAD(self) -> None:
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    return Handler
+
+
+def serve(port: int = 8790, latency: float = 0.0) -> ThreadingHTTPServer:
+    return ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+    server = serve(args.port, args.latency)
+    print(f"Google Translate stub on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Local OpenAI-compatible chat completions server for load tests.
+
+Usage: python benchmarks/stub_openai.py [--port 8791] [--latency 0.2] [--jitter 0.1]
+                                        [--per-char 0.0005] [--error-rate 0.02]
+                                        [--rate-limit-rate 0.02] [--retry-after 1]
+
+Answers POST /v1/chat/completions, streaming (SSE) or not. The
+"translation" echoes the source text tagged with the target language, so
+placeholders survive; for the multi-target prompt it returns the JSON
+object the bot asks for. Latency is latency + jitter * U(0, 1) + per-char
+* len(text); a stream spreads it over a few deltas. --error-rate answers
+500 and --rate-limit-rate answers 429 with Retry-After, each with that
+probability. Register it as a custom engine:
+
+    .addapi stub http://127.0.0.1:8791/v1 sk-stub stub-model
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_SINGLE_RE = re.compile(r"将以下文本翻译为 \[([^\]]+)\]\n(.*)", re.DOTALL)
+_BATCH_RE = re.compile(r"键为语言代码 (.*?)，值为.*?\n(.*)", re.DOTALL)
+
+
+def fake_translation(prompt: str) -> str:
+    batch = _BATCH_RE.search(prompt)
+    if batch:
+        langs = json.loads(f"[{batch.group(1)}]")
+        return json.dumps({lang: f"[{lang.upper()}] {batch.group(2)}" for lang in langs}, ensure_ascii=False)
+    single = _SINGLE_RE.search(prompt)
+    if single:
+        return f"[{single.group(1)}] {single.group(2)}"
+    return prompt
+
+
+class StubStats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+
+    def snapshot(self) -> dict[str, int]:
+        with self.lock:
+            return {"requests": self.requests, "errors": self.errors, "rate_limited": self.rate_limited}
+
+
+def make_handler(
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    per_char: float = 0.0,
+    error_rate: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    retry_after: float = 1.0,
+    stats: StubStats | None = None,
+) -> type[BaseHTTPRequestHandler]:
+    stats = stats or StubStats()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status: int, payload: dict, headers: dict[str, str] | None = None) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "not found"}})
+                return
+
+            roll = random.random()
+            with stats.lock:
+                stats.requests += 1
+                if roll < rate_limit_rate:
+                    stats.rate_limited += 1
+                elif roll < rate_limit_rate + error_rate:
+                    stats.errors += 1
+            if roll < rate_limit_rate:
+                self._send_json(
+                    429,
+                    {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                    {"Retry-After": str(retry_after)},
+                )
+                return
+            if roll < rate_limit_rate + error_rate:
+                self._send_json(500, {"error": {"message": "Injected failure", "type": "server_error"}})
+                return
+
+            prompt = request.get("messages", [{}])[-1].get("content", "")
+            content = fake_translation(prompt)
+            delay = latency + jitter * random.random() + per_char * len(content)
+            model = request.get("model", "stub-model")
+            if request.get("stream"):
+                self._stream(content, delay, model)
+                return
+            time.sleep(delay)
+            tokens = len(prompt) // 4 + len(content) // 4
+            self._send_json(200, {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                          "total_tokens": tokens},
+            })
+
+        def _stream(self, content: str, delay: float, model: str) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            pieces = max(1, min(8, len(content) // 20))
+            step = -(-len(content) // pieces)
+            try:
+                self._write_chunks(content, delay, model, pieces, step)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client cancelled the stream (e.g. a hedge fired)
+            self.close_connection = True
+
+        def _write_chunks(self, content: str, delay: float, model: str, pieces: int, step: int) -> None:
+            for i in range(0, len(content), step):
+                time.sleep(delay / pieces)
+                chunk = {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": content[i:i + step]}, "finish_reason": None}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+        def do_HEAD(self) -> None:
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    Handler.stats = stats
+    return Handler
+
+
+def serve(port: int = 8791, **options: float) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(**options))
+    server.daemon_threads = True
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8791)
+    parser.add_argument("--latency", type=float, default=0.2, help="base seconds per response")
+    parser.add_argument("--jitter", type=float, default=0.1, help="extra uniform random seconds")
+    parser.add_argument("--per-char", type=float, default=0.0, help="extra seconds per output character")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="probability of a 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After on 429s")
+    args = parser.parse_args()
+    server = serve(
+        args.port, latency=args.latency, jitter=args.jitter, per_char=args.per_char,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after,
+    )
+    print(f"OpenAI-compatible stub on http://127.0.0.1:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -8,12 +8,17 @@ import os
 import sys
 
 from dotenv import load_dotenv
-from pyrogram import Client, filters
+from pyrogram import Client, filters, idle
 
+from src.clients import warm_up_pools
+from src.config import flush_config
+from src.language import warm_up_detector
+from src.utils import create_tracked_task
 from src.handlers import (
     addapi_cmd,
     auto_cmd,
     auto_translate_handler,
+    bench_cmd,
     copy_cmd,
     delapi_cmd,
     detect_cmd,
@@ -69,6 +74,7 @@ _DOT_COMMANDS: list[tuple[str, object]] = [
     ("help",      help_cmd),
     ("status",    status_cmd),
     ("ping",      ping_cmd),
+    ("bench",     bench_cmd),
     ("detect",    detect_cmd),
     ("copy",      copy_cmd),
     ("len",       len_cmd),
@@ -112,7 +118,16 @@ app.on_message(filters.me & filters.text & ~filters.regex(r"^\."))(
     auto_translate_handler
 )
 
+
+async def main() -> None:
+    async with app:
+        create_tracked_task(warm_up_pools())
+        await idle()
+
+
 if __name__ == "__main__":
     logger.info("Translation bot starting...")
     logger.info("Auto-fallback gateway standing by...")
-    app.run()
+    warm_up_detector()
+    app.run(main())
+    flush_config()
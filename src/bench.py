@@ -0,0 +1,122 @@
+"""Concurrent engine benchmark behind the .bench command.
+
+Every engine is probed at the same time. Each one gets *samples* requests
+per input size, at most *concurrency* of them in flight, admitted at
+background priority so live translations still go first. Latency is timed
+around the engine call only (after admission), bypassing the result cache
+and single-flight. Summaries are appended to a small JSON history file.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any
+
+from .translation import (
+    PRIORITY_BACKGROUND,
+    _admitted,
+    _translate_with_engine,
+    request_priority,
+)
+from .utils import percentile
+
+logger = logging.getLogger("translate_bot")
+
+_SEED_TEXT = (
+    "The meeting has been moved to three in the afternoon, so please bring last week's report. "
+    "If anything is unclear, send me a message before lunch and I will get back to you. "
+)
+
+
+def sample_text(size: int, index: int = 0) -> str:
+    """*size* characters of plain prose; *index* makes each sample distinct."""
+    prefix = f"{index}. "
+    body = _SEED_TEXT * (size // len(_SEED_TEXT) + 1)
+    return (prefix + body)[:max(size, len(prefix) + 1)].rstrip()
+
+
+async def _bench_engine(
+    engine: str,
+    config: dict[str, Any],
+    samples: int,
+    sizes: list[int],
+    concurrency: int,
+    target_lang: str,
+) -> dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: dict[int, list[float]] = {size: [] for size in sizes}
+    errors: list[str] = []
+
+    async def one(size: int, index: int) -> None:
+        async with semaphore:
+            with request_priority(PRIORITY_BACKGROUND):
+                async with _admitted(engine, config):
+                    start = time.monotonic()
+                    try:
+                        await _translate_with_engine(sample_text(size, index), target_lang, engine, config)
+                    except Exception as e:
+                        errors.append(str(e))
+                        return
+                    latencies[size].append(time.monotonic() - start)
+
+    start = time.monotonic()
+    await asyncio.gather(*[one(size, i) for size in sizes for i in range(samples)])
+    elapsed = time.monotonic() - start
+
+    ok = [s for values in latencies.values() for s in values]
+    total = samples * len(sizes)
+    return {
+        "samples": total,
+        "ok": len(ok),
+        "error_rate": (total - len(ok)) / total if total else 0.0,
+        "last_error": errors[-1][:60] if errors else "",
+        "p50": percentile(ok, 50),
+        "p95": percentile(ok, 95),
+        "p99": percentile(ok, 99),
+        "throughput": len(ok) / elapsed if elapsed > 0 else 0.0,
+        "by_size": {str(size): percentile(values, 50) for size, values in latencies.items()},
+    }
+
+
+async def run_benchmark(
+    engines: list[str],
+    config: dict[str, Any],
+    samples: int = 5,
+    sizes: list[int] | None = None,
+    concurrency: int = 2,
+    target_lang: str = "zh-CN",
+) -> dict[str, dict[str, Any]]:
+    """Benchmark *engines* concurrently; returns per-engine summaries."""
+    sizes = sizes or [20, 200, 1000]
+    results = await asyncio.gather(*[
+        _bench_engine(engine, config, samples, sizes, concurrency, target_lang)
+        for engine in engines
+    ])
+    return dict(zip(engines, results))
+
+
+# ---------------------------------------------------------------------------
+# History
+# ---------------------------------------------------------------------------
+
+def load_history(path: str) -> list[dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, encoding="utf-8") as f:
+            history = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Unreadable bench history %s: %s", path, e)
+        return []
+    return history if isinstance(history, list) else []
+
+
+def append_history(path: str, record: dict[str, Any], limit: int = 20) -> None:
+    history = load_history(path)[-(limit - 1):] if limit > 1 else []
+    history.append(record)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(history, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
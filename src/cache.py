@@ -0,0 +1,171 @@
+"""Two-tier translation result cache: in-memory LRU backed by optional SQLite."""
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from .utils import create_tracked_task
+
+logger = logging.getLogger("translate_bot")
+
+
+class TranslationCache:
+    """LRU with TTL and a byte budget, optionally persisted to a SQLite file.
+
+    Values are the raw engine output for the *protected* text, so the same
+    sentence with different URLs/emojis shares one entry; callers restore
+    their own placeholders after a hit.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        max_bytes: int = 4 * 1024 * 1024,
+        ttl: float = 86400.0,
+        disk_path: str = "",
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # key -> (value, expires_at, size)
+        self._entries: OrderedDict[str, tuple[str, float, int]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+        if disk_path:
+            self._open_disk(disk_path)
+
+    @staticmethod
+    def make_key(text: str, target_lang: str, engine: str, model: str, prompt_version: int) -> str:
+        raw = "\x1f".join((str(prompt_version), engine, model, target_lang.lower(), text))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # -- memory tier --------------------------------------------------------
+
+    def _get_memory(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at, size = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self._bytes -= size
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put_memory(self, key: str, value: str, expires_at: float) -> None:
+        size = len(key) + len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[2]
+        self._entries[key] = (value, expires_at, size)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    # -- disk tier ----------------------------------------------------------
+
+    def _open_disk(self, path: str) -> None:
+        try:
+            db = sqlite3.connect(path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            db.execute("DELETE FROM translations WHERE expires_at <= ?", (time.time(),))
+            db.commit()
+            self._db = db
+        except sqlite3.Error as e:
+            logger.warning("Translation cache disk tier disabled: %s", e)
+
+    def _disk_get(self, key: str) -> tuple[str, float] | None:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return row[0], row[1]
+
+    def _disk_put(self, key: str, value: str, expires_at: float) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO translations (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            self._db.commit()
+
+    # -- public API ---------------------------------------------------------
+
+    async def get(self, key: str) -> str | None:
+        value = self._get_memory(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        if self._db is not None:
+            try:
+                row = await asyncio.to_thread(self._disk_get, key)
+            except sqlite3.Error as e:
+                logger.warning("Translation cache disk read failed: %s", e)
+                row = None
+            if row is not None:
+                self.disk_hits += 1
+                self._put_memory(key, row[0], row[1])
+                return row[0]
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, value: str) -> None:
+        expires_at = time.time() + self.ttl
+        self._put_memory(key, value, expires_at)
+        if self._db is not None:
+            create_tracked_task(asyncio.to_thread(self._disk_put, key, value, expires_at))
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+
+_cache: TranslationCache | None = None
+
+
+def get_translation_cache(config: dict[str, Any]) -> TranslationCache | None:
+    """Return the process-wide cache, or None when disabled in config."""
+    global _cache
+    cfg = config.get("cache", {})
+    if not cfg.get("enabled", True):
+        return None
+    if _cache is None:
+        _cache = TranslationCache(
+            max_entries=int(cfg.get("max_entries", 2048)),
+            max_bytes=int(cfg.get("max_bytes", 4 * 1024 * 1024)),
+            ttl=float(cfg.get("ttl", 86400)),
+            disk_path=cfg.get("disk_path", ""),
+        )
+    return _cache
@@ -1,81 +1,157 @@
 import asyncio
+import importlib.util
 import logging
 import os
+import time
 from typing import Any
 
 import httpx
 from google import genai
+from google.genai import types as genai_types
 from openai import AsyncOpenAI
 
+from .config import load_config
+
 logger = logging.getLogger("translate_bot")
 
 FALLBACK_OPENAI_KEY: str = os.getenv("FALLBACK_OPENAI_KEY", "")
 FALLBACK_GEMINI_KEY: str = os.getenv("FALLBACK_GEMINI_KEY", "")
 
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com"
+GOOGLE_BASE_URL = "https://translate.googleapis.com"
+
+# HTTP/2 needs the optional h2 package; without it pools speak HTTP/1.1.
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
 _openai_clients: dict[str, AsyncOpenAI] = {}
 _gemini_clients: dict[str, genai.Client] = {}
 _custom_clients: dict[str, AsyncOpenAI] = {}
 
+# One connection pool per upstream base URL, so engines never queue behind
+# each other's connections and one engine can be reset on its own.
+_pools: dict[str, httpx.AsyncClient] = {}
+
 
 def _create_http_client() -> httpx.AsyncClient:
+    cfg = load_config().get("http", {})
     return httpx.AsyncClient(
-        timeout=httpx.Timeout(30.0),
-        limits=httpx.Limits(max_connections=10),
+        http2=bool(cfg.get("http2", True)) and _HTTP2_AVAILABLE,
+        timeout=httpx.Timeout(float(cfg.get("timeout", 30.0))),
+        limits=httpx.Limits(
+            max_connections=int(cfg.get("max_connections", 20)),
+            max_keepalive_connections=int(cfg.get("max_keepalive", 10)),
+            keepalive_expiry=float(cfg.get("keepalive_expiry", 120.0)),
+        ),
     )
 
 
-_http_client: httpx.AsyncClient | None = None
+def get_http_client(base_url: str = "") -> httpx.AsyncClient:
+    """Return the pooled client for *base_url* (one shared pool for "")."""
+    pool = _pools.get(base_url)
+    if pool is None or pool.is_closed:
+        pool = _pools[base_url] = _create_http_client()
+    return pool
 
 
-def get_http_client() -> httpx.AsyncClient:
-    global _http_client
-    if _http_client is None:
-        _http_client = _create_http_client()
-    return _http_client
+def engine_base_url(engine: str, config: dict[str, Any]) -> str:
+    if engine == "openai":
+        return OPENAI_BASE_URL
+    if engine == "gemini":
+        return GEMINI_BASE_URL
+    if engine == "google":
+        return config.get("google", {}).get("base_url", GOOGLE_BASE_URL).rstrip("/")
+    return config.get("custom_engines", {}).get(engine, {}).get("base_url", "")
 
 
-def get_openai_client(config: dict[str, Any]) -> AsyncOpenAI:
-    key = config["api_keys"].get("openai") or FALLBACK_OPENAI_KEY
+def get_openai_client(config: dict[str, Any], key: str | None = None) -> AsyncOpenAI:
+    key = key or config["api_keys"].get("openai") or FALLBACK_OPENAI_KEY
     if key not in _openai_clients:
         _openai_clients[key] = AsyncOpenAI(
             api_key=key,
-            http_client=get_http_client(),
+            max_retries=0,  # _with_retry/_with_key retry; a 429 must reach the key pool
+            http_client=get_http_client(OPENAI_BASE_URL),
         )
     return _openai_clients[key]
 
 
-def get_gemini_client(config: dict[str, Any]) -> genai.Client:
-    key = config["api_keys"].get("gemini") or FALLBACK_GEMINI_KEY
+def get_gemini_client(config: dict[str, Any], key: str | None = None) -> genai.Client:
+    key = key or config["api_keys"].get("gemini") or FALLBACK_GEMINI_KEY
     if key not in _gemini_clients:
         _gemini_clients[key] = genai.Client(
             api_key=key,
-            http_client=get_http_client(),
+            http_options=genai_types.HttpOptions(httpx_async_client=get_http_client(GEMINI_BASE_URL)),
         )
     return _gemini_clients[key]
 
 
-def get_custom_client(cfg: dict[str, Any]) -> AsyncOpenAI:
+def get_custom_client(cfg: dict[str, Any], key: str | None = None) -> AsyncOpenAI:
     """Get or create a cached AsyncOpenAI client for a custom engine."""
-    cache_key = f"{cfg['base_url']}|{cfg['api_key']}"
+    key = key or cfg["api_key"]
+    cache_key = f"{cfg['base_url']}|{key}"
     if cache_key not in _custom_clients:
         _custom_clients[cache_key] = AsyncOpenAI(
-            api_key=cfg["api_key"],
+            api_key=key,
             base_url=cfg["base_url"],
             timeout=15.0,
-            http_client=get_http_client(),
+            max_retries=0,
+            http_client=get_http_client(cfg["base_url"]),
         )
     return _custom_clients[cache_key]
 
 
+def _close_pool(pool: httpx.AsyncClient) -> None:
+    try:
+        loop = asyncio.get_running_loop()
+        loop.create_task(pool.aclose())
+    except RuntimeError:
+        pass
+
+
+def invalidate_engine(engine: str, config: dict[str, Any]) -> None:
+    """Drop one engine's SDK clients and connection pool; others stay warm."""
+    base_url = engine_base_url(engine, config)
+    if engine == "openai":
+        _openai_clients.clear()
+    elif engine == "gemini":
+        _gemini_clients.clear()
+    else:
+        for cache_key in [k for k in _custom_clients if k.startswith(f"{base_url}|")]:
+            del _custom_clients[cache_key]
+    pool = _pools.pop(base_url, None)
+    if pool is not None:
+        _close_pool(pool)
+    logger.info("Invalidated clients  engine=%s", engine)
+
+
 def clear_clients() -> None:
-    global _http_client
     _openai_clients.clear()
     _gemini_clients.clear()
     _custom_clients.clear()
-    if _http_client is not None:
+    for pool in _pools.values():
+        _close_pool(pool)
+    _pools.clear()
+
+
+async def warm_up_pools(config: dict[str, Any] | None = None) -> None:
+    """Open a connection (DNS, TCP, TLS) to every configured engine ahead of use.
+
+    A HEAD on the base URL is enough for the pool to keep the connection;
+    the status code does not matter.
+    """
+    config = config or load_config()
+    engines = [e for e in ("openai", "gemini") if config.get("api_keys", {}).get(e)]
+    engines += [*config.get("custom_engines", {}), "google"]
+
+    async def _warm(engine: str) -> None:
+        base_url = engine_base_url(engine, config)
+        if not base_url:
+            return
+        start = time.monotonic()
         try:
-            loop = asyncio.get_running_loop()
-            loop.create_task(_http_client.aclose())
-        except RuntimeError:
-            pass
-        _http_client = None
+            await get_http_client(base_url).head(base_url, timeout=5.0)
+            logger.info("Warmed pool  engine=%s  %.0fms", engine, (time.monotonic() - start) * 1000)
+        except httpx.HTTPError as e:
+            logger.debug("Pool warm-up failed  engine=%s: %s", engine, e)
+
+    await asyncio.gather(*[_warm(e) for e in engines])
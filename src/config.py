@@ -1,9 +1,15 @@
-import copy
+import asyncio
+import atexit
+import ctypes
 import json
 import logging
 import os
+import sys
+import tempfile
+import threading
 import time
-from typing import Any
+from types import MappingProxyType
+from typing import Any, Mapping
 
 logger = logging.getLogger("translate_bot")
 
@@ -17,39 +23,315 @@ DEFAULT_CONFIG: dict[str, Any] = {
     "models": {"openai": "gpt-4o-mini", "gemini": "gemini-1.5-flash"},
     "auto_cmd": "",
     "api_keys": {"openai": "", "gemini": ""},
+    "batch_multi_target": True,
+    "stream": {"enabled": True, "edit_interval": 1.5},
+    "edits": {"per_chat_interval": 1.0, "global_rate": 20},
+    "vocab": {"backend": "sqlite", "path": "vocab.db"},
+    "cache": {
+        "enabled": True,
+        "max_entries": 2048,
+        "max_bytes": 4 * 1024 * 1024,
+        "ttl": 86400,
+        "disk_path": "translations.db",
+    },
+    "hedge": {
+        "enabled": True,
+        "delay": 4.0,
+        "use_p90": True,
+        "min_samples": 10,
+        "max_delay": 30.0,
+    },
+    "breaker": {
+        "failure_threshold": 3,
+        "cooldown": 30,
+        "max_cooldown": 600,
+    },
+    "http": {
+        "http2": True,
+        "timeout": 30,
+        "max_connections": 20,
+        "max_keepalive": 10,
+        "keepalive_expiry": 120,
+    },
+    "google": {
+        "base_url": "https://translate.googleapis.com",
+        "batch_size": 16,
+        "max_batch_chars": 4500,
+        "batch_window": 0.01,
+    },
+    "limits": {
+        "global": 8,
+        "per_engine": 4,
+        "engines": {},
+    },
+    "chunking": {
+        "threshold": 1500,
+        "max_chars": 1200,
+        "max_parallel": 4,
+    },
+    "bench": {
+        "samples": 5,
+        "sizes": [20, 200, 1000],
+        "concurrency": 2,
+        "history_path": "bench_history.json",
+        "history_size": 20,
+    },
+    "key_pool": {
+        "strategy": "round_robin",
+        "cooldown": 60,
+        "quota_cooldown": 3600,
+    },
+    "keys": {"openai": [], "gemini": []},
 }
 
-_config_cache: dict[str, Any] | None = None
-_cache_timestamp: float = 0
-_CACHE_TTL: float = 5.0
+# ---------------------------------------------------------------------------
+# Read-only snapshots
+#
+# load_config() hands out a frozen view (MappingProxyType / tuple) of the
+# current config. Updates build a new dict and swap it in (copy-on-write),
+# so readers never see a half-applied change and never mutate shared state.
+# ---------------------------------------------------------------------------
 
+_raw: dict[str, Any] | None = None
+_snapshot: Mapping[str, Any] | None = None
+_version = 0
+_file_sig: tuple[int, int, int] | None = None
+_last_stat = 0.0
+_STAT_INTERVAL: float = 1.0
 
-def load_config() -> dict[str, Any]:
-    global _config_cache, _cache_timestamp
-    now = time.monotonic()
-    if _config_cache is not None and (now - _cache_timestamp) < _CACHE_TTL:
-        return _config_cache
-    config = copy.deepcopy(DEFAULT_CONFIG)
-    if os.path.exists(CONFIG_FILE):
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_thaw(v) for v in value]
+    return value
+
+
+def _stat_config() -> tuple[int, int, int] | None:
+    try:
+        st = os.stat(CONFIG_FILE)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_ino, st.st_size
+
+
+def _read_config_file() -> tuple[dict[str, Any], tuple[int, int, int] | None]:
+    config = dict(DEFAULT_CONFIG)
+    sig = _stat_config()
+    if sig is not None:
         try:
             with open(CONFIG_FILE, "r", encoding="utf-8") as f:
                 saved = json.load(f)
             config.update(saved)
         except (json.JSONDecodeError, OSError) as e:
             logger.warning("Could not load config, using defaults: %s", e)
-    _config_cache = config
-    _cache_timestamp = now
-    return config
+    return config, sig
+
+
+def _install(raw: dict[str, Any]) -> None:
+    global _raw, _snapshot, _version
+    _raw = raw
+    _snapshot = _freeze(raw)
+    _version += 1
+
+
+def _reload_if_changed() -> None:
+    global _file_sig
+    # Unsaved changes win over the file until the persister has written them.
+    if _dirty or _writing:
+        return
+    if _stat_config() == _file_sig:
+        return
+    raw, sig = _read_config_file()
+    _file_sig = sig
+    _install(raw)
+    logger.info("Config reloaded (version %d)", _version)
+
+
+def load_config() -> Mapping[str, Any]:
+    """Return the current read-only config snapshot.
+
+    With the watcher running (started on first use inside an event loop)
+    this is a plain global read; otherwise the file is re-stat'ed at most
+    every _STAT_INTERVAL seconds and re-parsed only if it changed.
+    """
+    global _file_sig, _last_stat
+    if _snapshot is None:
+        raw, _file_sig = _read_config_file()
+        _install(raw)
+    if _watcher_task is None or _watcher_task.done():
+        _ensure_watcher()
+        now = time.monotonic()
+        if now - _last_stat >= _STAT_INTERVAL:
+            _last_stat = now
+            _reload_if_changed()
+    return _snapshot
+
+
+def config_version() -> int:
+    """Incremented every time a new snapshot is installed."""
+    load_config()
+    return _version
 
 
 def save_config(key: str, value: Any) -> None:
-    global _config_cache, _cache_timestamp
-    config = load_config()
-    config[key] = value
-    _config_cache = config
-    _cache_timestamp = time.monotonic()
+    """Install a new snapshot with *key* set and schedule a write-behind flush.
+
+    Bursts of calls within _SAVE_DEBOUNCE seconds are coalesced into one
+    write, performed off the event loop. Without a running loop the write
+    happens immediately.
+    """
+    global _dirty, _flush_task
+    load_config()
+    _install({**_raw, key: _thaw(value)})
+    _dirty = True
     try:
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        flush_config()
+        return
+    if _flush_task is None or _flush_task.done():
+        _flush_task = loop.create_task(_flush_later())
+
+
+# ---------------------------------------------------------------------------
+# Write-behind persistence: debounced, off-loop, atomic (temp file + replace)
+# ---------------------------------------------------------------------------
+
+_SAVE_DEBOUNCE: float = 0.3
+
+_dirty = False
+_writing = 0
+_flush_task: asyncio.Task | None = None
+_write_lock = threading.Lock()
+
+
+def _write_config_file(snapshot: dict[str, Any]) -> None:
+    global _file_sig
+    directory = os.path.dirname(os.path.abspath(CONFIG_FILE))
+    with _write_lock:
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".config.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, CONFIG_FILE)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        _file_sig = _stat_config()
+
+
+async def _flush_later() -> None:
+    global _dirty, _writing
+    await asyncio.sleep(_SAVE_DEBOUNCE)
+    while _dirty:
+        _dirty = False
+        # _raw is replaced, never mutated, so it is safe to dump off-loop.
+        _writing += 1
+        try:
+            await asyncio.to_thread(_write_config_file, _raw)
+        except OSError as e:
+            logger.error("Failed to save config: %s", e)
+        finally:
+            _writing -= 1
+
+
+def flush_config() -> None:
+    """Synchronously write pending changes; called on shutdown."""
+    global _dirty
+    if not _dirty or _raw is None:
+        return
+    _dirty = False
+    try:
+        _write_config_file(_raw)
     except OSError as e:
         logger.error("Failed to save config: %s", e)
+
+
+atexit.register(flush_config)
+
+
+# ---------------------------------------------------------------------------
+# File watcher: inotify on Linux, mtime/inode polling elsewhere
+# ---------------------------------------------------------------------------
+
+_POLL_INTERVAL: float = 2.0
+
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+_watcher_task: asyncio.Task | None = None
+
+
+def _ensure_watcher() -> None:
+    global _watcher_task
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    _watcher_task = loop.create_task(_watch_config())
+
+
+def _inotify_open(directory: str) -> int | None:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            return None
+        mask = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+        if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+async def _watch_config() -> None:
+    directory = os.path.dirname(os.path.abspath(CONFIG_FILE))
+    fd = _inotify_open(directory)
+    if fd is None:
+        while True:
+            await asyncio.sleep(_POLL_INTERVAL)
+            _reload_if_changed()
+
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+
+    def on_readable() -> None:
+        try:
+            while os.read(fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        wake.set()
+
+    loop.add_reader(fd, on_readable)
+    try:
+        while True:
+            await wake.wait()
+            wake.clear()
+            _reload_if_changed()
+    finally:
+        loop.remove_reader(fd)
+        os.close(fd)
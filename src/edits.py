@@ -0,0 +1,198 @@
+"""Rate-limited, coalescing message edits (and follow-up replies) with FloodWait handling."""
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Any
+
+from pyrogram.errors import FloodWait, MessageNotModified
+
+from .config import load_config
+
+logger = logging.getLogger("translate_bot")
+
+
+class _PendingEdit:
+    __slots__ = ("message", "text", "kwargs", "method", "waiters", "flood_retries")
+
+    def __init__(self, message: Any, text: str, kwargs: dict[str, Any], method: str = "edit_text") -> None:
+        self.message = message
+        self.text = text
+        self.kwargs = kwargs
+        self.method = method
+        self.waiters: list[asyncio.Future] = []
+        self.flood_retries = 0
+
+
+class EditScheduler:
+    """Serialises edits per chat and throttles them per chat and globally.
+
+    An edit queued for a message that already has one waiting replaces the
+    waiting content, so only the latest text is sent; every caller is
+    resolved once that edit lands. FloodWait puts the edit back at the head
+    of its chat queue and pauses the chat for the requested time.
+    """
+
+    def __init__(
+        self,
+        per_chat_interval: float = 1.0,
+        global_rate: float = 20.0,
+        max_flood_retries: int = 3,
+        max_flood_wait: float = 120.0,
+    ) -> None:
+        self.per_chat_interval = per_chat_interval
+        self.global_rate = global_rate
+        self.max_flood_retries = max_flood_retries
+        self.max_flood_wait = max_flood_wait
+        self._pending: dict[tuple[int, int], _PendingEdit] = {}
+        self._queues: dict[int, deque[tuple[int, int]]] = {}
+        self._reply_seq = itertools.count(1)
+        self._workers: dict[int, asyncio.Task] = {}
+        self._chat_ready_at: dict[int, float] = {}
+        self._tokens = global_rate
+        self._refilled_at = time.monotonic()
+        self.sent = 0
+        self.coalesced = 0
+        self.flood_waits = 0
+
+    async def edit(self, message: Any, text: str, **kwargs: Any) -> None:
+        await self.submit(message, text, **kwargs)
+
+    def submit(self, message: Any, text: str, **kwargs: Any) -> asyncio.Future:
+        """Enqueue an edit now; the returned future resolves once it lands."""
+        chat_id = getattr(getattr(message, "chat", None), "id", 0)
+        key = (chat_id, message.id)
+        waiter = asyncio.get_running_loop().create_future()
+        pending = self._pending.get(key)
+        if pending is not None:
+            pending.message, pending.text, pending.kwargs = message, text, kwargs
+            self.coalesced += 1
+        else:
+            pending = self._pending[key] = _PendingEdit(message, text, kwargs)
+            self._queues.setdefault(chat_id, deque()).append(key)
+        pending.waiters.append(waiter)
+        self._wake(chat_id)
+        return waiter
+
+    def submit_reply(self, message: Any, text: str, **kwargs: Any) -> asyncio.Future:
+        """Enqueue a reply to *message*; replies are never coalesced."""
+        chat_id = getattr(getattr(message, "chat", None), "id", 0)
+        # Negative ids cannot collide with a real message's pending edit.
+        key = (chat_id, -next(self._reply_seq))
+        waiter = asyncio.get_running_loop().create_future()
+        pending = self._pending[key] = _PendingEdit(message, text, kwargs, "reply_text")
+        self._queues.setdefault(chat_id, deque()).append(key)
+        pending.waiters.append(waiter)
+        self._wake(chat_id)
+        return waiter
+
+    def _wake(self, chat_id: int) -> None:
+        if chat_id not in self._workers:
+            self._workers[chat_id] = asyncio.create_task(self._run(chat_id))
+
+    async def _acquire_global(self) -> None:
+        while True:
+            now = time.monotonic()
+            self._tokens = min(
+                self.global_rate, self._tokens + (now - self._refilled_at) * self.global_rate
+            )
+            self._refilled_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.global_rate)
+
+    async def _run(self, chat_id: int) -> None:
+        queue = self._queues[chat_id]
+        try:
+            while queue:
+                delay = self._chat_ready_at.get(chat_id, 0.0) - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await self._acquire_global()
+                key = queue.popleft()
+                pending = self._pending.pop(key)
+                try:
+                    await getattr(pending.message, pending.method)(pending.text, **pending.kwargs)
+                except FloodWait as e:
+                    self.flood_waits += 1
+                    wait = float(e.value or 1)
+                    pending.flood_retries += 1
+                    logger.warning("FloodWait %.0fs on chat %s (attempt %d)", wait, chat_id, pending.flood_retries)
+                    if pending.flood_retries > self.max_flood_retries or wait > self.max_flood_wait:
+                        _resolve(pending.waiters, e)
+                        continue
+                    self._chat_ready_at[chat_id] = time.monotonic() + wait
+                    newer = self._pending.get(key)
+                    if newer is not None:
+                        newer.waiters[:0] = pending.waiters
+                    else:
+                        self._pending[key] = pending
+                        queue.appendleft(key)
+                    continue
+                except MessageNotModified:
+                    pass
+                except Exception as e:
+                    _resolve(pending.waiters, e)
+                    continue
+                self.sent += 1
+                self._chat_ready_at[chat_id] = time.monotonic() + self.per_chat_interval
+                _resolve(pending.waiters)
+        finally:
+            del self._workers[chat_id]
+            if not queue:
+                self._queues.pop(chat_id, None)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "flood_waits": self.flood_waits,
+            "pending": len(self._pending),
+        }
+
+
+def _resolve(waiters: list[asyncio.Future], error: BaseException | None = None) -> None:
+    for waiter in waiters:
+        if waiter.done():
+            continue
+        if error is None:
+            waiter.set_result(None)
+        else:
+            waiter.set_exception(error)
+
+
+_scheduler: EditScheduler | None = None
+
+
+def get_edit_scheduler() -> EditScheduler:
+    global _scheduler
+    if _scheduler is None:
+        cfg = load_config().get("edits", {})
+        _scheduler = EditScheduler(
+            per_chat_interval=float(cfg.get("per_chat_interval", 1.0)),
+            global_rate=float(cfg.get("global_rate", 20.0)),
+        )
+    return _scheduler
+
+
+async def edit_message(message: Any, text: str, **kwargs: Any) -> None:
+    """Queue an edit through the shared scheduler and wait until it lands."""
+    await get_edit_scheduler().edit(message, text, **kwargs)
+
+
+async def send_reply(message: Any, text: str, **kwargs: Any) -> None:
+    """Send a reply through the scheduler (throttled, FloodWait-aware) and wait for it."""
+    await get_edit_scheduler().submit_reply(message, text, **kwargs)
+
+
+def queue_edit(message: Any, text: str, **kwargs: Any) -> None:
+    """Queue an edit without waiting; later edits to the message supersede it."""
+    get_edit_scheduler().submit(message, text, **kwargs).add_done_callback(_log_edit_failure)
+
+
+def _log_edit_failure(waiter: asyncio.Future) -> None:
+    if not waiter.cancelled() and waiter.exception():
+        logger.debug("Queued edit failed: %s", waiter.exception())
@@ -0,0 +1,121 @@
+"""Async client for the public Google Translate endpoint.
+
+Requests go over the pooled httpx client for the endpoint's base URL.
+Segments for the same target language that arrive within a short window
+are sent together in one request (the endpoint takes repeated ``q``
+fields), so the chunks of a long message cost one round trip instead of
+one per chunk.
+"""
+
+import asyncio
+import logging
+from typing import Any
+
+from .clients import GOOGLE_BASE_URL, get_http_client
+from .config import load_config
+from .utils import create_tracked_task
+
+logger = logging.getLogger("translate_bot")
+
+
+def _parse_batch(payload: Any, count: int) -> list[str]:
+    """Translations in request order from a translate_a/t response.
+
+    With sl=auto each item is [translation, detected_lang]; a single
+    segment may come back as that pair alone, or as a bare string.
+    """
+    if isinstance(payload, str):
+        payload = [payload]
+    if not isinstance(payload, list):
+        raise ValueError("Unexpected Google response")
+    if count == 1 and payload and isinstance(payload[0], str):
+        return [payload[0]]
+    items = [item[0] if isinstance(item, list) and item else item for item in payload]
+    if len(items) != count or not all(isinstance(item, str) for item in items):
+        raise ValueError(f"Google returned {len(items)} results for {count} segments")
+    return items
+
+
+class GoogleTranslateClient:
+    def __init__(
+        self,
+        base_url: str = GOOGLE_BASE_URL,
+        batch_size: int = 16,
+        max_batch_chars: int = 4500,
+        batch_window: float = 0.01,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.batch_size = batch_size
+        self.max_batch_chars = max_batch_chars
+        self.batch_window = batch_window
+        self._pending: dict[str, list[tuple[str, asyncio.Future]]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self.requests = 0
+        self.segments = 0
+
+    async def translate(self, text: str, target_lang: str) -> str:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        queue = self._pending.setdefault(target_lang, [])
+        queue.append((text, future))
+        if len(queue) >= self.batch_size or sum(len(t) for t, _ in queue) >= self.max_batch_chars:
+            self._flush(target_lang)
+        elif target_lang not in self._timers:
+            self._timers[target_lang] = loop.call_later(self.batch_window, self._flush, target_lang)
+        return await future
+
+    def _flush(self, target_lang: str) -> None:
+        timer = self._timers.pop(target_lang, None)
+        if timer is not None:
+            timer.cancel()
+        items = [item for item in self._pending.pop(target_lang, []) if not item[1].done()]
+        batch: list[tuple[str, asyncio.Future]] = []
+        size = 0
+        for item in items:
+            if batch and size + len(item[0]) > self.max_batch_chars:
+                create_tracked_task(self._send(target_lang, batch))
+                batch, size = [], 0
+            batch.append(item)
+            size += len(item[0])
+        if batch:
+            create_tracked_task(self._send(target_lang, batch))
+
+    async def _send(self, target_lang: str, batch: list[tuple[str, asyncio.Future]]) -> None:
+        self.requests += 1
+        self.segments += len(batch)
+        try:
+            response = await get_http_client(self.base_url).post(
+                f"{self.base_url}/translate_a/t",
+                params={"client": "gtx", "sl": "auto", "tl": target_lang, "format": "text"},
+                data={"q": [text for text, _ in batch]},
+            )
+            response.raise_for_status()
+            results = _parse_batch(response.json(), len(batch))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict[str, int]:
+        return {"requests": self.requests, "segments": self.segments}
+
+
+_client: GoogleTranslateClient | None = None
+
+
+def get_google_client() -> GoogleTranslateClient:
+    global _client
+    cfg = load_config().get("google", {})
+    base_url = cfg.get("base_url", GOOGLE_BASE_URL)
+    if _client is None or _client.base_url != base_url.rstrip("/"):
+        _client = GoogleTranslateClient(
+            base_url=base_url,
+            batch_size=int(cfg.get("batch_size", 16)),
+            max_batch_chars=int(cfg.get("max_batch_chars", 4500)),
+            batch_window=float(cfg.get("batch_window", 0.01)),
+        )
+    return _client
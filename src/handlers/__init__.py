@@ -30,6 +30,7 @@ from .utility import (
     help_cmd,
     status_cmd,
     ping_cmd,
+    bench_cmd,
     detect_cmd,
     copy_cmd,
     len_cmd,
@@ -63,6 +64,7 @@ __all__ = [
     "help_cmd",
     "status_cmd",
     "ping_cmd",
+    "bench_cmd",
     "detect_cmd",
     "copy_cmd",
     "len_cmd",
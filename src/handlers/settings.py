@@ -5,7 +5,7 @@ from typing import Any
 from pyrogram import Client
 from pyrogram.enums import ParseMode
 
-from ..clients import clear_clients
+from ..clients import invalidate_engine
 from ..config import load_config, save_config
 from ..utils import create_tracked_task, delete_later
 
@@ -16,9 +16,8 @@ async def setkey_cmd(client: Client, message: Any) -> None:
         engine, new_key = parts[1].strip().lower(), parts[2].strip()
         config = load_config()
         if engine in ("openai", "gemini"):
-            api_keys = config.get("api_keys", {})
-            api_keys[engine] = new_key
-            clear_clients()
+            api_keys = {**config.get("api_keys", {}), engine: new_key}
+            invalidate_engine(engine, config)
             save_config("api_keys", api_keys)
             await message.edit_text(f"✅ `{engine}` 的 API Key 已更新！", parse_mode=ParseMode.MARKDOWN)
         else:
@@ -56,12 +55,11 @@ async def setmodel_cmd(client: Client, message: Any) -> None:
         engine = config.get("engine", "gemini")
         new_model = parts[1].strip()
         if engine in ("openai", "gemini"):
-            m = config.get("models", {})
-            m[engine] = new_model
-            save_config("models", m)
+            save_config("models", {**config.get("models", {}), engine: new_model})
         elif engine in config.get("custom_engines", {}):
-            config["custom_engines"][engine]["model"] = new_model
-            save_config("custom_engines", config["custom_engines"])
+            engines = dict(config["custom_engines"])
+            engines[engine] = {**engines[engine], "model": new_model}
+            save_config("custom_engines", engines)
         await message.edit_text(f"✅ `{engine}` 模型改为: **{new_model}**", parse_mode=ParseMode.MARKDOWN)
     else:
         await message.edit_text("❌ 用法: `.setmodel <模型名>`")
@@ -97,8 +95,13 @@ async def _upsert_api(client: Client, message: Any, verb: str) -> None:
     if len(parts) == 5:
         _, name, url, key, model = parts
         config = load_config()
-        config["custom_engines"][name.lower()] = {"base_url": url, "api_key": key, "model": model}
-        save_config("custom_engines", config["custom_engines"])
+        if name.lower() in config["custom_engines"]:
+            invalidate_engine(name.lower(), config)
+        engines = {
+            **config["custom_engines"],
+            name.lower(): {"base_url": url, "api_key": key, "model": model},
+        }
+        save_config("custom_engines", engines)
         await message.edit_text(f"✅ {verb}引擎: `{name}`", parse_mode=ParseMode.MARKDOWN)
     else:
         await message.edit_text("❌ 用法: `.addapi <名称> <base_url> <api_key> <model>`")
@@ -119,8 +122,10 @@ async def delapi_cmd(client: Client, message: Any) -> None:
         name = parts[1].strip().lower()
         config = load_config()
         if name in config["custom_engines"]:
-            del config["custom_engines"][name]
-            save_config("custom_engines", config["custom_engines"])
+            invalidate_engine(name, config)
+            engines = dict(config["custom_engines"])
+            del engines[name]
+            save_config("custom_engines", engines)
             if config.get("engine") == name:
                 save_config("engine", "gemini")
             await message.edit_text(f"🗑 删除引擎: `{name}`", parse_mode=ParseMode.MARKDOWN)
@@ -2,18 +2,90 @@
 
 import asyncio
 import logging
+import time
 from typing import Any
 
 from pyrogram import Client
 from pyrogram.enums import ParseMode
 
 from ..config import load_config
+from ..edits import edit_message, queue_edit, send_reply
 from ..language import detect_swap_target, is_same_language
-from ..translation import EMOJI_PATTERN, translate_text_with_fallback
+from ..translation import (
+    EMOJI_PATTERN,
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    request_priority,
+    split_text,
+    translate_chunked,
+    translate_multi_with_fallback,
+    translate_text_streaming,
+)
 from ..utils import create_tracked_task, delete_later
 
 logger = logging.getLogger("translate_bot")
 
+_STREAM_CURSOR = " ▌"
+# Telegram's message length limit, with headroom for the HTML markup.
+_MESSAGE_LIMIT = 4096
+_BLOCK_OVERHEAD = len("<blockquote></blockquote>") + len("<b>[ZH-CN]</b> ") + 2
+
+
+def _compose(original_text: str, blocks: list[str], mode: str) -> str:
+    if mode == "append":
+        return f"{original_text}\n" + "\n".join(blocks)
+    return "\n\n".join(blocks)
+
+
+def _paginate(original_text: str, blocks: list[tuple[str, str]], mode: str) -> list[str]:
+    """Lay (prefix, text) blocks out over as few messages as the size limit allows.
+
+    Texts too long for one message are split at sentence boundaries, each
+    part in its own blockquote; the first page keeps the original text in
+    append mode.
+    """
+    parts: list[str] = []
+    for prefix, body in blocks:
+        for i, (piece, _) in enumerate(split_text(body, _MESSAGE_LIMIT - _BLOCK_OVERHEAD)):
+            parts.append(f"<blockquote>{prefix if i == 0 else ''}{piece}</blockquote>")
+
+    pages: list[list[str]] = [[]]
+    # The first page in append mode already carries the original text, so a
+    # part that does not fit next to it moves on to the next page.
+    size = len(original_text) + 1 if mode == "append" else 0
+    for part in parts:
+        if size and size + len(part) + 2 > _MESSAGE_LIMIT:
+            pages.append([])
+            size = 0
+        pages[-1].append(part)
+        size += len(part) + 2
+    first = _compose(original_text, pages[0], mode)
+    return [first] + ["\n\n".join(page) for page in pages[1:]]
+
+
+async def _translate_streaming(
+    message: Any, original_text: str, target_lang: str, engine: str, mode: str, interval: float,
+) -> str:
+    """Translate one target, editing the partial result in at most every *interval* seconds."""
+    last_edit = time.monotonic()
+    last_partial = ""
+
+    async def on_partial(partial: str) -> None:
+        nonlocal last_edit, last_partial
+        now = time.monotonic()
+        if now - last_edit < interval or not partial.strip() or partial == last_partial:
+            return
+        last_edit, last_partial = now, partial
+        # Not awaited: a newer partial or the final text supersedes this one
+        # in the scheduler if it has not been sent yet.
+        queue_edit(
+            message,
+            _compose(original_text, [f"<blockquote>{partial}{_STREAM_CURSOR}</blockquote>"], mode),
+            parse_mode=ParseMode.HTML,
+        )
+
+    return await translate_text_streaming(original_text, target_lang, engine, on_partial)
+
 
 async def do_translate_and_edit(
     message: Any,
@@ -21,6 +93,15 @@ async def do_translate_and_edit(
     target_langs_str: str,
     mode: str = "append",
     skip_if_target: bool = False,
+    background: bool = False,
+) -> None:
+    # Auto-mode translations queue behind explicit commands for engine slots.
+    with request_priority(PRIORITY_BACKGROUND if background else PRIORITY_INTERACTIVE):
+        await _translate_and_edit(message, original_text, target_langs_str, mode, skip_if_target)
+
+
+async def _translate_and_edit(
+    message: Any, original_text: str, target_langs_str: str, mode: str, skip_if_target: bool,
 ) -> None:
     config = load_config()
     current_engine = config.get("engine", "gemini")
@@ -42,33 +123,47 @@ async def do_translate_and_edit(
 
     try:
         loading = f"<blockquote>⏳ 翻译中 ({current_engine.upper()})...</blockquote>"
-        await message.edit_text(
-            f"{original_text}\n{loading}" if mode == "append" else loading,
-            parse_mode=ParseMode.HTML,
-        )
-        results = await asyncio.gather(
-            *[translate_text_with_fallback(original_text, lang, current_engine) for lang in target_langs]
-        )
-        final_blocks: list[str] = []
+        queue_edit(message, _compose(original_text, [loading], mode), parse_mode=ParseMode.HTML)
+        stream_cfg = config.get("stream", {})
+        chunk_cfg = config.get("chunking", {})
+        if len(original_text) > int(chunk_cfg.get("threshold", 1500)):
+            async def on_progress(done: int, total: int) -> None:
+                progress = f"<blockquote>⏳ 翻译中 ({current_engine.upper()}) {done}/{total}...</blockquote>"
+                queue_edit(message, _compose(original_text, [progress], mode), parse_mode=ParseMode.HTML)
+
+            results = await translate_chunked(
+                original_text, target_langs, current_engine,
+                max_chars=int(chunk_cfg.get("max_chars", 1200)),
+                max_parallel=int(chunk_cfg.get("max_parallel", 4)),
+                on_progress=on_progress,
+            )
+        elif len(target_langs) == 1 and stream_cfg.get("enabled", True):
+            results = [await _translate_streaming(
+                message, original_text, target_langs[0], current_engine, mode,
+                float(stream_cfg.get("edit_interval", 1.5)),
+            )]
+        else:
+            results = await translate_multi_with_fallback(original_text, target_langs, current_engine)
+        final_blocks: list[tuple[str, str]] = []
         has_error = False
         for lang, result in zip(target_langs, results):
             if result.startswith("ERROR:"):
                 has_error = True
-                final_blocks.append(f"<blockquote>❌ [{lang.upper()}] 翻译失败</blockquote>")
+                final_blocks.append(("", f"❌ [{lang.upper()}] 翻译失败"))
             else:
                 prefix = f"<b>[{lang.upper()}]</b> " if len(target_langs) > 1 else ""
-                final_blocks.append(f"<blockquote>{prefix}{result}</blockquote>")
-        final_text = (
-            f"{original_text}\n" + "\n".join(final_blocks)
-            if mode == "append" else "\n\n".join(final_blocks)
-        )
-        await message.edit_text(final_text, parse_mode=ParseMode.HTML)
+                final_blocks.append((prefix, result))
+        pages = _paginate(original_text, final_blocks, mode)
+        await edit_message(message, pages[0], parse_mode=ParseMode.HTML)
+        # Whatever does not fit goes out as follow-up replies, in order.
+        for page in pages[1:]:
+            await send_reply(message, page, parse_mode=ParseMode.HTML)
         if has_error:
             await asyncio.sleep(5)
-            await message.edit_text(original_text)
+            await edit_message(message, original_text)
     except Exception as e:
         logger.exception("do_translate_and_edit failed")
-        await message.edit_text(f"{original_text}\n\n⚠️ 系统异常: {str(e)[:50]}")
+        await edit_message(message, f"{original_text}\n\n⚠️ 系统异常: {str(e)[:50]}")
         create_tracked_task(delete_later(message, 5))
 
 
@@ -112,12 +207,24 @@ async def auto_translate_handler(client: Client, message: Any) -> None:
         target_lang = detect_swap_target(
             text, config.get("home_lang", "zh-CN"), config.get("default_lang", "ja")
         )
-        await do_translate_and_edit(message, text, target_lang, mode="append")
+        await do_translate_and_edit(message, text, target_lang, mode="append", background=True)
     elif cmd == "tr":
-        await do_translate_and_edit(message, text, config["default_lang"], mode="append", skip_if_target=True)
+        await do_translate_and_edit(
+            message, text, config["default_lang"], mode="append",
+            skip_if_target=True, background=True,
+        )
     elif cmd == "rr":
-        await do_translate_and_edit(message, text, config["default_lang"], mode="replace", skip_if_target=True)
+        await do_translate_and_edit(
+            message, text, config["default_lang"], mode="replace",
+            skip_if_target=True, background=True,
+        )
     elif cmd == "t" and len(parts) > 1:
-        await do_translate_and_edit(message, text, parts[1], mode="append", skip_if_target=True)
+        await do_translate_and_edit(
+            message, text, parts[1], mode="append",
+            skip_if_target=True, background=True,
+        )
     elif cmd == "r" and len(parts) > 1:
-        await do_translate_and_edit(message, text, parts[1], mode="replace", skip_if_target=True)
+        await do_translate_and_edit(
+            message, text, parts[1], mode="replace",
+            skip_if_target=True, background=True,
+        )
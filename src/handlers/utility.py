@@ -1,17 +1,24 @@
-"""Utility command handlers: help, status, ping, detect, copy, len."""
+"""Utility command handlers: help, status, ping, bench, detect, copy, len."""
 
 import asyncio
+import logging
 import time
 from typing import Any
 
 from pyrogram import Client
 from pyrogram.enums import ParseMode
 
+from ..bench import append_history, load_history, run_benchmark
+from ..cache import get_translation_cache
 from ..config import load_config
-from ..language import detect_language
-from ..translation import _translate_with_engine
+from ..edits import get_edit_scheduler
+from ..key_pool import key_pool_stats
+from ..language import detect_language_with_confidence
+from ..translation import _translate_with_engine, admission_stats, engine_health, inflight_stats
 from ..utils import create_tracked_task, delete_later
 
+logger = logging.getLogger("translate_bot")
+
 
 HELP_TEXT = """\
 🤖 **高可用多语翻译网关 · 完整指令手册**
@@ -71,6 +78,8 @@ tr/rr 模式内置智能跳过：如果消息已是目标
   或: 回复消息后发 `.detect`
 
 `.ping` — 测试所有引擎延迟
+`.bench [引擎,...] [n=5] [c=2] [sizes=20,200,1000]` — 并发压测
+  报告 p50/p95/p99、吞吐与错误率; `.bench history` 查看历史
 `.status` — 查看所有当前配置
 
 ━━━━━━━━━━━━━━━━━━━━━━
@@ -178,6 +187,31 @@ async def status_cmd(client: Client, message: Any) -> None:
         for n, c in custom_engines.items()
     ) or "  (无)"
 
+    cache = get_translation_cache(config)
+    if cache is not None:
+        cs = cache.stats()
+        cache_line = (
+            f"{cs['entries']} 条 / {cs['bytes'] // 1024}KB · 命中率 {cs['hit_rate']:.0%} "
+            f"(内存 {cs['hits']} · 磁盘 {cs['disk_hits']} · 未命中 {cs['misses']} · 淘汰 {cs['evictions']})"
+        )
+    else:
+        cache_line = "关闭"
+
+    state_icons = {"closed": "🟢", "half_open": "🟡", "open": "🔴"}
+    health_lines = "\n".join(
+        f"  {state_icons.get(h['state'], '⚪')} `{n}` — "
+        f"{int((h['ewma_latency'] or 0) * 1000)}ms · 错误率 {h['error_rate']:.0%}"
+        for n, h in engine_health().items()
+    ) or "  (暂无数据)"
+    key_lines = "\n".join(
+        f"  • `{n}` — 可用 {k['available']}/{k['keys']} · 请求 {k['requests']}"
+        f" · tokens {k['tokens']} · 限流 {k['rate_limited']}"
+        for n, k in key_pool_stats().items()
+    ) or "  (暂无数据)"
+    es = get_edit_scheduler().stats()
+    adm = admission_stats()
+    inf = inflight_stats()
+
     await message.edit_text(
         "📊 **当前系统状态**\n\n"
         f"🔄 **引擎**: `{engine}`\n"
@@ -187,8 +221,15 @@ async def status_cmd(client: Client, message: Any) -> None:
         f"🌐 **默认外语**: `{config.get('default_lang','ja')}`\n\n"
         f"🤖 **自动模式**: `{'.' + config.get('auto_cmd','') if config.get('auto_cmd') else '关闭'}`\n\n"
         f"🔑 **OpenAI Key**: {key_status(api_keys.get('openai',''))}\n"
-        f"🔑 **Gemini Key**: {key_status(api_keys.get('gemini',''))}\n\n"
-        f"🔌 **自定义引擎**:\n{custom_lines}",
+        f"🔑 **Gemini Key**: {key_status(api_keys.get('gemini',''))}\n"
+        f"🗝 **Key 池**:\n{key_lines}\n\n"
+        f"🔌 **自定义引擎**:\n{custom_lines}\n\n"
+        f"🗃 **翻译缓存**: {cache_line}\n\n"
+        f"🩺 **引擎健康**:\n{health_lines}\n\n"
+        f"✏️ **编辑调度**: 已发送 {es['sent']} · 合并 {es['coalesced']} · FloodWait {es['flood_waits']}\n"
+        f"🚦 **并发调度**: 运行 {adm['active']}/{adm['limit']} · 排队 {adm['queued']}"
+        f" (后台 {adm['queued_background']}) · 等待 p50 {adm['wait_p50']:.2f}s / p95 {adm['wait_p95']:.2f}s"
+        f" · 合并请求 {inf['coalesced']}",
         parse_mode=ParseMode.MARKDOWN,
     )
     create_tracked_task(delete_later(message, 15))
@@ -215,6 +256,114 @@ async def ping_cmd(client: Client, message: Any) -> None:
     create_tracked_task(delete_later(message, 20))
 
 
+def _parse_bench_args(args: list[str], cfg: dict[str, Any], all_engines: list[str]) -> tuple[list[str], int, int, list[int]]:
+    engines = all_engines
+    samples = int(cfg.get("samples", 5))
+    concurrency = int(cfg.get("concurrency", 2))
+    sizes = [int(x) for x in cfg.get("sizes", [20, 200, 1000])]
+    for arg in args:
+        key, _, value = arg.partition("=")
+        if not value:
+            engines = [e for e in arg.split(",") if e]
+        elif key == "n":
+            samples = max(1, min(int(value), 100))
+        elif key == "c":
+            concurrency = max(1, min(int(value), 16))
+        elif key == "sizes":
+            sizes = [max(1, min(int(x), 4000)) for x in value.split(",") if x]
+        else:
+            raise ValueError(f"未知参数: {arg}")
+    unknown = [e for e in engines if e not in all_engines]
+    if unknown:
+        raise ValueError(f"未知引擎: {', '.join(unknown)}")
+    return engines, samples, concurrency, sizes
+
+
+def _bench_history_text(history: list[dict[str, Any]], engines: list[str]) -> str:
+    lines = ["🗂 **压测历史** (p50 / p95 · 吞吐 · 错误率)\n"]
+    for record in history[-5:]:
+        stamp = time.strftime("%m-%d %H:%M", time.localtime(record.get("time", 0)))
+        params = record.get("params", {})
+        lines.append(f"**{stamp}** n={params.get('samples')} c={params.get('concurrency')} sizes={params.get('sizes')}")
+        for name, r in record.get("results", {}).items():
+            if engines and name not in engines:
+                continue
+            lines.append(
+                f"  `{name}` {int(r['p50'] * 1000)} / {int(r['p95'] * 1000)}ms"
+                f" · {r['throughput']:.2f}/s · {r['error_rate']:.0%}"
+            )
+    return "\n".join(lines)
+
+
+async def bench_cmd(client: Client, message: Any) -> None:
+    config = load_config()
+    cfg = config.get("bench", {})
+    history_path = cfg.get("history_path", "bench_history.json")
+    all_engines = ["gemini", "openai", "google"] + list(config.get("custom_engines", {}).keys())
+    args = message.text.split()[1:]
+
+    if args and args[0] == "history":
+        history = await asyncio.to_thread(load_history, history_path)
+        if not history:
+            await message.edit_text("🗂 暂无压测记录")
+        else:
+            await message.edit_text(_bench_history_text(history, args[1:]), parse_mode=ParseMode.MARKDOWN)
+        create_tracked_task(delete_later(message, 30))
+        return
+
+    try:
+        engines, samples, concurrency, sizes = _parse_bench_args(args, cfg, all_engines)
+    except ValueError as e:
+        await message.edit_text(
+            f"❌ {e}\n用法: `.bench [引擎,...] [n=5] [c=2] [sizes=20,200,1000]`",
+            parse_mode=ParseMode.MARKDOWN,
+        )
+        create_tracked_task(delete_later(message, 8))
+        return
+
+    await message.edit_text(
+        f"⏱ 正在并发压测 {len(engines)} 个引擎 · 每档 {samples} 次 · 并发 {concurrency} · 长度 {sizes}..."
+    )
+    start = time.monotonic()
+    results = await run_benchmark(
+        engines, config, samples, sizes, concurrency, config.get("home_lang", "zh-CN")
+    )
+    elapsed = time.monotonic() - start
+
+    lines: list[str] = []
+    for engine, r in sorted(results.items(), key=lambda kv: (kv[1]["error_rate"], kv[1]["p50"])):
+        icon = "✅" if r["error_rate"] == 0 else ("⚠️" if r["ok"] else "❌")
+        lines.append(
+            f"{icon} `{engine}` — p50 {int(r['p50'] * 1000)} · p95 {int(r['p95'] * 1000)}"
+            f" · p99 {int(r['p99'] * 1000)}ms · {r['throughput']:.2f}/s · 错误 {r['error_rate']:.0%}"
+        )
+        if r["ok"]:
+            lines.append("    " + " · ".join(
+                f"{size}字 {int(p50 * 1000)}ms" for size, p50 in r["by_size"].items()
+            ))
+        if r["last_error"]:
+            lines.append(f"    ({r['last_error'][:40]})")
+
+    record = {
+        "time": time.time(),
+        "params": {"samples": samples, "concurrency": concurrency, "sizes": sizes},
+        "results": {
+            e: {k: r[k] for k in ("p50", "p95", "p99", "throughput", "error_rate", "samples")}
+            for e, r in results.items()
+        },
+    }
+    try:
+        await asyncio.to_thread(append_history, history_path, record, int(cfg.get("history_size", 20)))
+    except OSError as e:
+        logger.warning("Could not save bench history: %s", e)
+
+    await message.edit_text(
+        f"⏱ **引擎压测结果** ({elapsed:.1f}s)\n\n" + "\n".join(lines),
+        parse_mode=ParseMode.MARKDOWN,
+    )
+    create_tracked_task(delete_later(message, 60))
+
+
 async def detect_cmd(client: Client, message: Any) -> None:
     parts = message.text.split(maxsplit=1)
     target: str | None = (
@@ -228,10 +377,10 @@ async def detect_cmd(client: Client, message: Any) -> None:
         )
         create_tracked_task(delete_later(message, 5))
         return
-    detected = await asyncio.to_thread(detect_language, target)
+    detected, confidence = await asyncio.to_thread(detect_language_with_confidence, target)
     preview = target[:40] + ("..." if len(target) > 40 else "")
     await message.edit_text(
-        f"🔍 **语言检测结果**\n\n文本: `{preview}`\n检测语言: **`{detected}`**",
+        f"🔍 **语言检测结果**\n\n文本: `{preview}`\n检测语言: **`{detected}`**\n置信度: {confidence:.0%}",
         parse_mode=ParseMode.MARKDOWN,
     )
     create_tracked_task(delete_later(message, 8))
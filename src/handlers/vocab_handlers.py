@@ -2,22 +2,27 @@
 
 import datetime
 import re
+import time
+from collections import OrderedDict, deque
 from typing import Any
 
 from pyrogram import Client
 from pyrogram.enums import ParseMode
 
 from ..config import load_config
+from ..language import script_language
 from ..utils import create_tracked_task, delete_later
 from ..vocab import (
     add_word,
     check_writing,
+    count_learned,
     delete_word,
     generate_quiz,
     get_due_words,
+    next_due_word,
     get_stats,
+    get_word,
     get_words,
-    load_vocab,
     record_quiz_result,
     review_word,
 )
@@ -43,6 +48,60 @@ def _format_review_card(word: dict[str, Any]) -> str:
     )
 
 
+# ---------------------------------------------------------------------------
+# Review sessions
+# ---------------------------------------------------------------------------
+
+_REVIEW_PREFETCH = 10
+_MAX_REVIEW_SESSIONS = 256
+
+
+class _ReviewSession:
+    __slots__ = ("word_id", "upcoming")
+
+    def __init__(self, word_id: int, upcoming: deque[int]) -> None:
+        self.word_id = word_id
+        self.upcoming = upcoming
+
+
+# (chat_id, card message id) -> session for the card shown in that message.
+_review_sessions: OrderedDict[tuple[int, int], _ReviewSession] = OrderedDict()
+
+
+def _session_key(message: Any) -> tuple[int, int]:
+    return getattr(getattr(message, "chat", None), "id", 0), message.id
+
+
+def _prefetch_due(exclude: int) -> deque[int]:
+    return deque(w["id"] for w in get_due_words(limit=_REVIEW_PREFETCH + 1) if w["id"] != exclude)
+
+
+def _next_card(upcoming: deque[int], exclude: int) -> dict[str, Any] | None:
+    """Pop the next still-due word from the queue, refilling it when it runs dry."""
+    for refill in (False, True):
+        if refill:
+            upcoming.extend(_prefetch_due(exclude))
+        while upcoming:
+            word = get_word(upcoming.popleft())
+            if word is not None and word["id"] != exclude and word.get("next_review", 0) <= time.time():
+                return word
+    return None
+
+
+def _show_card(message: Any, word: dict[str, Any], upcoming: deque[int]) -> None:
+    _review_sessions[_session_key(message)] = _ReviewSession(word["id"], upcoming)
+    while len(_review_sessions) > _MAX_REVIEW_SESSIONS:
+        _review_sessions.popitem(last=False)
+
+
+def _legacy_card_word(reply_text: str) -> dict[str, Any] | None:
+    """Recover the word of a card shown before a restart by its text."""
+    match = re.search(r'\n\n\*\*([^*]+)\*\*\n', reply_text)
+    if not match:
+        return None
+    return next((w for w in get_due_words() if w.get("word") == match.group(1)), None)
+
+
 # ---------------------------------------------------------------------------
 # Sub-command handlers for .vocab
 # ---------------------------------------------------------------------------
@@ -72,7 +131,9 @@ async def _vocab_add(message: Any, parts: list[str]) -> None:
     translation = parts[3].strip()
     example = parts[4].strip() if len(parts) > 4 else ""
 
-    new_word = add_word(word, translation, example)
+    # Tag the word only when its script settles the language; a lone Latin
+    # word is too short to detect and stays "auto".
+    new_word = add_word(word, translation, example, lang=script_language(word) or "auto")
 
     example_text = f"例句: {new_word['example']}" if new_word["example"] else ""
     await message.edit_text(
@@ -144,14 +205,15 @@ async def _vocab_stats(message: Any) -> None:
 
 
 async def _vocab_review(message: Any) -> None:
-    due = get_due_words()
+    due = next_due_word()
 
-    if not due:
+    if due is None:
         await message.edit_text("✅ 暂无待复习单词!")
         create_tracked_task(delete_later(message, 5))
         return
 
-    await message.edit_text(_format_review_card(due[0]), parse_mode=ParseMode.MARKDOWN)
+    await message.edit_text(_format_review_card(due), parse_mode=ParseMode.MARKDOWN)
+    _show_card(message, due, _prefetch_due(due["id"]))
 
 
 _VOCAB_ACTIONS = {
@@ -198,31 +260,28 @@ async def vocab_review_response(client: Client, message: Any) -> None:
     except ValueError:
         return
 
-    match = re.search(r'\n\n\*\*([^*]+)\*\*\n', reply_text)
-    if not match:
-        return
-
-    word_text = match.group(1)
+    session = _review_sessions.pop(_session_key(message.reply_to_message), None)
+    if session is not None:
+        word_id, upcoming = session.word_id, session.upcoming
+    else:
+        word = _legacy_card_word(reply_text)
+        if word is None:
+            return
+        word_id, upcoming = word["id"], deque()
 
-    words = get_words(limit=100)
-    for w in words:
-        if w.get("word") == word_text:
-            review_word(w["id"], quality)
-            break
+    review_word(word_id, quality)
 
-    due = get_due_words()
-    if due:
-        await message.edit_text(_format_review_card(due[0]), parse_mode=ParseMode.MARKDOWN)
+    due = _next_card(upcoming, exclude=word_id)
+    if due is not None:
+        await message.edit_text(_format_review_card(due), parse_mode=ParseMode.MARKDOWN)
+        _show_card(message, due, upcoming)
     else:
         await message.edit_text("✅ 恭喜! 所有单词都已复习完毕!")
         create_tracked_task(delete_later(message, 5))
 
 
 async def quiz_cmd(client: Client, message: Any) -> None:
-    vocab = load_vocab()
-    words = [w for w in vocab.get("words", []) if w.get("repetitions", 0) > 0]
-
-    if len(words) < 4:
+    if count_learned() < 4:
         await message.edit_text(
             "❌ 词汇量不足，需要至少 4 个已学习的单词才能开始测验\n"
             "请先使用 `.vocab add` 添加单词，并用 `.vocab review` 复习几次",
@@ -231,7 +290,7 @@ async def quiz_cmd(client: Client, message: Any) -> None:
         create_tracked_task(delete_later(message, 10))
         return
 
-    questions = generate_quiz(num_questions=5)
+    questions = generate_quiz(num_questions=5, weak_bias=1.0)
 
     if not questions:
         await message.edit_text("❌ 无法生成测验，请先复习一些单词")
@@ -262,8 +321,9 @@ async def write_cmd(client: Client, message: Any) -> None:
 
     result = check_writing(text, lang)
 
-    if result["results"]:
-        r = result["results"][0]
+    results = result["results"]
+    if results and results[0]["correct"]:
+        r = results[0]
         example_text = f"例句: {r['example']}" if r.get("example") else ""
         await message.edit_text(
             f"✅ **写作检查**\n\n"
@@ -272,6 +332,14 @@ async def write_cmd(client: Client, message: Any) -> None:
             f"{example_text}",
             parse_mode=ParseMode.MARKDOWN,
         )
+    elif results:
+        suggestions = "\n".join(f"• **{r['word']}** — {r['translation']}" for r in results)
+        await message.edit_text(
+            f"✏️ **写作检查**\n\n"
+            f"你写的: **{text}**\n\n"
+            f"没有完全匹配，你是不是想写:\n{suggestions}",
+            parse_mode=ParseMode.MARKDOWN,
+        )
     else:
         await message.edit_text(
             f"❓ **写作检查**\n\n"
@@ -0,0 +1,153 @@
+"""API key pools for the LLM engines.
+
+Each engine draws from every key it has: ``api_keys[engine]`` (or a custom
+engine's ``api_key``), the lists under ``keys[engine]`` and the env
+fallback. A call leases one key, picked round-robin or least-loaded, and
+the pool keeps per-key request, token and error counters. A key that
+answers 429 or reports an exhausted quota sits out for the server's
+Retry-After (or the configured cooldown) while the others keep serving.
+"""
+
+import email.utils
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from .clients import FALLBACK_GEMINI_KEY, FALLBACK_OPENAI_KEY
+from .config import load_config
+
+logger = logging.getLogger("translate_bot")
+
+_QUOTA_MARKERS = ("insufficient_quota", "resource_exhausted", "quota exceeded")
+
+
+class KeysExhausted(Exception):
+    """Every key of an engine is cooling down after rate limiting."""
+
+
+@dataclass
+class KeyState:
+    key: str
+    in_flight: int = 0
+    requests: int = 0
+    tokens: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    cooldown_until: float = 0.0
+
+    def available(self, now: float) -> bool:
+        return self.cooldown_until <= now
+
+
+def engine_keys(engine: str, config: dict[str, Any]) -> list[str]:
+    """All distinct non-empty keys configured for *engine*, primary first.
+
+    A custom engine with no key at all (e.g. a local endpoint) gets one
+    keyless entry, so it is called with an empty key as before.
+    """
+    if engine == "openai":
+        primary, fallback = config.get("api_keys", {}).get("openai", ""), FALLBACK_OPENAI_KEY
+    elif engine == "gemini":
+        primary, fallback = config.get("api_keys", {}).get("gemini", ""), FALLBACK_GEMINI_KEY
+    else:
+        primary, fallback = config.get("custom_engines", {}).get(engine, {}).get("api_key", ""), ""
+    extra = config.get("keys", {}).get(engine, [])
+    keys = [k for k in dict.fromkeys([primary, *extra, fallback]) if k]
+    if not keys and engine in config.get("custom_engines", {}):
+        return [""]
+    return keys
+
+
+def retry_after(error: Exception) -> float | None:
+    """Seconds to rest a key after *error*, or None if it is not a rate limit."""
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    message = str(error).lower()
+    if status != 429 and not any(m in message for m in _QUOTA_MARKERS):
+        return None
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    cfg = load_config().get("key_pool", {})
+    if any(m in message for m in _QUOTA_MARKERS):
+        return float(cfg.get("quota_cooldown", 3600))
+    return float(cfg.get("cooldown", 60))
+
+
+class KeyPool:
+    def __init__(self, engine: str) -> None:
+        self.engine = engine
+        self._states: dict[str, KeyState] = {}
+        self._order = itertools.count()
+
+    def sync(self, keys: list[str]) -> None:
+        """Adopt the configured key list, keeping counters for known keys."""
+        if list(self._states) != keys:
+            self._states = {k: self._states.get(k) or KeyState(k) for k in keys}
+
+    def acquire(self, strategy: str = "round_robin", exclude: set[str] | None = None) -> KeyState:
+        if not self._states:
+            raise ValueError(f"No API key configured for {self.engine}")
+        now = time.monotonic()
+        ready = [
+            s for s in self._states.values()
+            if s.available(now) and (not exclude or s.key not in exclude)
+        ]
+        if not ready:
+            wait = min(s.cooldown_until for s in self._states.values()) - now
+            raise KeysExhausted(f"{self.engine}: all {len(self._states)} keys rate limited ({max(wait, 0):.0f}s)")
+        if strategy == "least_loaded":
+            state = min(ready, key=lambda s: (s.in_flight, s.requests))
+        else:
+            state = ready[next(self._order) % len(ready)]
+        state.in_flight += 1
+        state.requests += 1
+        return state
+
+    def release(self, state: KeyState, error: Exception | None = None) -> bool:
+        """Return the key; True if *error* was a rate limit and the key now cools down."""
+        state.in_flight -= 1
+        if error is None:
+            return False
+        state.errors += 1
+        delay = retry_after(error)
+        if delay is None:
+            return False
+        state.rate_limited += 1
+        state.cooldown_until = time.monotonic() + delay
+        logger.warning("Key rate limited  engine=%s  key=…%s  cooldown=%.0fs", self.engine, state.key[-4:], delay)
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "keys": len(self._states),
+            "available": sum(1 for s in self._states.values() if s.available(now)),
+            "requests": sum(s.requests for s in self._states.values()),
+            "tokens": sum(s.tokens for s in self._states.values()),
+            "rate_limited": sum(s.rate_limited for s in self._states.values()),
+        }
+
+
+_pools: dict[str, KeyPool] = {}
+
+
+def get_key_pool(engine: str, config: dict[str, Any]) -> KeyPool:
+    pool = _pools.get(engine)
+    if pool is None:
+        pool = _pools[engine] = KeyPool(engine)
+    pool.sync(engine_keys(engine, config))
+    return pool
+
+
+def key_pool_stats() -> dict[str, dict[str, Any]]:
+    return {engine: pool.stats() for engine, pool in _pools.items() if pool._states}
@@ -1,47 +1,274 @@
-import re
+import json
+import logging
+import math
+import os
+import threading
 from functools import lru_cache
+from typing import Any, Iterable
 
-from langdetect import detect as langdetect_detect, LangDetectException
+import langdetect
+from langdetect import LangDetectException, detect_langs as langdetect_detect_langs
+
+try:
+    import numpy as np
+except ImportError:  # optional: Latin-script text falls back to langdetect
+    np = None
+
+logger = logging.getLogger("translate_bot")
 
 _LANG_ALIASES: dict[str, str] = {
     "zh-cn": "zh-CN", "zh-tw": "zh-TW", "zh": "zh-CN", "jp": "ja",
 }
 
-_KO_RE = re.compile(r"[\uAC00-\uD7AF\u1100-\u11FF\u3130-\u318F]")
-_JA_RE = re.compile(r"[\u3040-\u30FF]")
-_AR_RE = re.compile(r"[\u0600-\u06FF]")
-_RU_RE = re.compile(r"[\u0400-\u04FF]")
-_TH_RE = re.compile(r"[\u0E00-\u0E7F]")
-_HE_RE = re.compile(r"[\u0590-\u05FF]")
-_CJK_RE = re.compile(r"[\u4E00-\u9FFF]")
+# Script classes for the codepoint table below.
+_OTHER, _LATIN, _HANGUL, _KANA, _HAN, _CYRILLIC, _ARABIC, _HEBREW, _THAI = range(9)
+
+_SCRIPT_RANGES: tuple[tuple[int, int, int], ...] = (
+    (0x0041, 0x005A, _LATIN), (0x0061, 0x007A, _LATIN), (0x00C0, 0x024F, _LATIN),
+    (0x0400, 0x04FF, _CYRILLIC),
+    (0x0590, 0x05FF, _HEBREW),
+    (0x0600, 0x06FF, _ARABIC),
+    (0x0E00, 0x0E7F, _THAI),
+    (0x1100, 0x11FF, _HANGUL), (0x3130, 0x318F, _HANGUL), (0xAC00, 0xD7AF, _HANGUL),
+    (0x3040, 0x30FF, _KANA), (0xFF66, 0xFF9F, _KANA),
+    (0x3400, 0x4DBF, _HAN), (0x4E00, 0x9FFF, _HAN),
+    (0xFF21, 0xFF3A, _LATIN), (0xFF41, 0xFF5A, _LATIN),
+)
+
+# One byte per BMP codepoint; anything above the BMP counts as "other".
+_SCRIPT_TABLE = bytearray(0x10000)
+for _lo, _hi, _script in _SCRIPT_RANGES:
+    _SCRIPT_TABLE[_lo:_hi + 1] = bytes([_script]) * (_hi - _lo + 1)
+
+# Scripts that name a single language outright.
+_SCRIPT_LANG = {
+    _HANGUL: "ko", _KANA: "ja", _CYRILLIC: "ru", _ARABIC: "ar", _HEBREW: "he", _THAI: "th",
+}
 
 
 def _normalise(lang: str) -> str:
     return _LANG_ALIASES.get(lang.lower(), lang.lower())
 
 
+def _script_histogram(text: str) -> tuple[list[int], int]:
+    """Count letters per script in one pass; stops at the first hangul or kana.
+
+    Returns (counts, decisive) where decisive is the script that ended the
+    scan early, or _OTHER if the whole text was read.
+    """
+    table = _SCRIPT_TABLE
+    counts = [0] * 9
+    for ch in text:
+        cp = ord(ch)
+        script = table[cp] if cp < 0x10000 else _OTHER
+        if script == _HANGUL or script == _KANA:
+            counts[script] += 1
+            return counts, script
+        counts[script] += 1
+    return counts, _OTHER
+
+
+def _detect_by_script(text: str) -> tuple[str, float] | None:
+    """Answer from the script histogram, or None for Latin-script text."""
+    counts, decisive = _script_histogram(text)
+    if decisive != _OTHER:
+        return _SCRIPT_LANG[decisive], 1.0
+
+    letters = sum(counts) - counts[_OTHER]
+    if letters == 0:
+        return "unknown", 0.0
+
+    best = max((_CYRILLIC, _ARABIC, _HEBREW, _THAI), key=counts.__getitem__)
+    if counts[best]:
+        return _SCRIPT_LANG[best], counts[best] / letters
+    if counts[_HAN] / letters > 0.3:
+        return "zh-CN", counts[_HAN] / letters
+    return None
+
+
+# ---------------------------------------------------------------------------
+# N-gram model for Latin-script text
+# ---------------------------------------------------------------------------
+
+# Per language, the most frequent 1-3 grams that go into the shared vocabulary.
+_NGRAM_TOP = 1000
+# Added to every n-gram probability, as langdetect does (alpha 0.5 / 10000).
+_NGRAM_SMOOTHING = 5e-5
+_PROFILE_DIR = os.path.join(os.path.dirname(langdetect.__file__), "profiles")
+
+
+class _NgramModel:
+    """Naive-Bayes scorer over langdetect's profiles, held as one NumPy matrix.
+
+    Only Latin-script languages are kept (other scripts never reach the
+    model). The vocabulary is the union of each language's top n-grams;
+    log-probabilities for the whole vocabulary come from the full profiles,
+    so a text is scored with one gather and one segmented sum.
+    """
+
+    def __init__(self, profile_dir: str = _PROFILE_DIR) -> None:
+        profiles = []
+        for name in sorted(os.listdir(profile_dir)):
+            with open(os.path.join(profile_dir, name), "r", encoding="utf-8") as f:
+                profile = json.load(f)
+            # Profiles keep case; texts are lowercased before scoring.
+            folded: dict[str, int] = {}
+            for gram, count in profile["freq"].items():
+                folded[gram.lower()] = folded.get(gram.lower(), 0) + count
+            profile["freq"] = folded
+            unigrams = {g: c for g, c in profile["freq"].items() if len(g) == 1}
+            latin = sum(c for g, c in unigrams.items() if _SCRIPT_TABLE[ord(g)] == _LATIN)
+            if latin > 0.5 * sum(unigrams.values()):
+                profiles.append(profile)
+
+        vocab: dict[str, int] = {}
+        for profile in profiles:
+            n_words = profile["n_words"]
+            ranked = sorted(
+                (g for g in profile["freq"] if _is_latin_gram(g)),
+                key=lambda g: profile["freq"][g] / n_words[len(g) - 1],
+                reverse=True,
+            )
+            for gram in ranked[:_NGRAM_TOP]:
+                vocab.setdefault(gram, len(vocab))
+
+        logp = np.empty((len(vocab), len(profiles)), dtype=np.float32)
+        for col, profile in enumerate(profiles):
+            freq, n_words = profile["freq"], profile["n_words"]
+            for gram, row in vocab.items():
+                prob = freq.get(gram, 0) / n_words[len(gram) - 1]
+                logp[row, col] = math.log(prob + _NGRAM_SMOOTHING)
+
+        self.langs = [_normalise(p["name"]) for p in profiles]
+        self.vocab = vocab
+        self.logp = logp
+
+    def _features(self, text: str) -> list[int]:
+        vocab = self.vocab
+        features = []
+        for word in "".join(ch if ch.isalpha() else " " for ch in text.lower()).split():
+            padded = f" {word} "
+            for n in (1, 2, 3):
+                for i in range(len(padded) - n + 1):
+                    row = vocab.get(padded[i:i + n])
+                    if row is not None:
+                        features.append(row)
+        return features
+
+    def score(self, texts: list[str]) -> list[tuple[str, float]]:
+        rows: list[int] = []
+        offsets: list[int] = []
+        scored: list[int] = []
+        for i, text in enumerate(texts):
+            features = self._features(text)
+            if features:
+                offsets.append(len(rows))
+                scored.append(i)
+                rows.extend(features)
+
+        results = [("unknown", 0.0)] * len(texts)
+        if not rows:
+            return results
+        totals = np.add.reduceat(self.logp[np.asarray(rows)], np.asarray(offsets), axis=0)
+        best = totals.argmax(axis=1)
+        # Posterior of the winner: softmax over the per-language log-likelihoods.
+        shifted = np.exp(totals - totals[np.arange(len(best)), best][:, None])
+        confidence = 1.0 / shifted.sum(axis=1)
+        for i, lang_idx, conf in zip(scored, best.tolist(), confidence.tolist()):
+            results[i] = (self.langs[lang_idx], round(conf, 3))
+        return results
+
+
+def _is_latin_gram(gram: str) -> bool:
+    return gram.strip() != "" and all(ch == " " or _SCRIPT_TABLE[ord(ch)] == _LATIN for ch in gram)
+
+
+_model: _NgramModel | None = None
+_model_lock = threading.Lock()
+
+
+def _get_model() -> _NgramModel | None:
+    global _model
+    if np is None:
+        return None
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                try:
+                    _model = _NgramModel()
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning("N-gram detector unavailable, using langdetect: %s", e)
+                    return None
+    return _model
+
+
+def warm_up_detector() -> None:
+    """Load the n-gram profiles now instead of on the first message."""
+    _get_model()
+
+
+def _langdetect(text: str) -> tuple[str, float]:
+    try:
+        top = langdetect_detect_langs(text)[0]
+        return _normalise(top.lang), round(top.prob, 3)
+    except (LangDetectException, IndexError):
+        return "unknown", 0.0
+
+
+def _detect_latin(texts: list[str]) -> list[tuple[str, float]]:
+    model = _get_model()
+    if model is None:
+        return [_langdetect(text) for text in texts]
+    return model.score(texts)
+
+
 @lru_cache(maxsize=512)
+def detect_language_with_confidence(text: str) -> tuple[str, float]:
+    """Return (language code, confidence in [0, 1]).
+
+    Non-Latin scripts are answered from the script histogram alone;
+    Latin-script text is scored by the n-gram model (langdetect when NumPy
+    is not installed).
+    """
+    result = _detect_by_script(text)
+    if result is not None:
+        return result
+    return _detect_latin([text])[0]
+
+
+def detect_many(texts: Iterable[str]) -> list[tuple[str, float]]:
+    """Classify many texts at once; Latin-script ones are scored as one batch."""
+    texts = list(texts)
+    results: list[Any] = [_detect_by_script(text) for text in texts]
+    pending = [i for i, r in enumerate(results) if r is None]
+    if pending:
+        for i, result in zip(pending, _detect_latin([texts[i] for i in pending])):
+            results[i] = result
+    return results
+
+
+def script_language(text: str) -> str | None:
+    """The language *text*'s script alone settles (kana -> ja, all hangul -> ko), else None.
+
+    For a single word this is the only trustworthy answer: the n-gram model
+    guesses wildly on a few Latin letters (hello -> it, nice -> pl).
+    """
+    result = _detect_by_script(text)
+    return result[0] if result is not None and result[1] == 1.0 else None
+
+
+def dominant_script(text: str) -> int:
+    """The script class most of *text*'s letters belong to (_OTHER if none)."""
+    counts, decisive = _script_histogram(text)
+    if decisive != _OTHER:
+        return decisive
+    counts[_OTHER] = 0
+    best = max(range(len(counts)), key=counts.__getitem__)
+    return best if counts[best] else _OTHER
+
+
 def detect_language(text: str) -> str:
-    if _KO_RE.search(text):
-        return "ko"
-    if _JA_RE.search(text):
-        return "ja"
-    if _AR_RE.search(text):
-        return "ar"
-    if _RU_RE.search(text):
-        return "ru"
-    if _TH_RE.search(text):
-        return "th"
-    if _HE_RE.search(text):
-        return "he"
-    try:
-        return _normalise(langdetect_detect(text))
-    except LangDetectException:
-        pass
-    cjk = len(_CJK_RE.findall(text))
-    if cjk / max(len(text.replace(" ", "")), 1) > 0.3:
-        return "zh-CN"
-    return "unknown"
+    return detect_language_with_confidence(text)[0]
 
 
 def is_same_language(text: str, target_lang: str) -> bool:
@@ -1,13 +1,28 @@
 import asyncio
+import contextlib
+import heapq
+import itertools
+import json
 import logging
+import math
 import os
 import re
-from typing import Any
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, TypeVar
 
-from deep_translator import GoogleTranslator
+import httpx
+import openai
 
+from .cache import TranslationCache, get_translation_cache
 from .clients import get_gemini_client, get_openai_client, get_custom_client, get_http_client
 from .config import load_config
+from .google_translate import get_google_client
+from .key_pool import KeyState, get_key_pool
+from .utils import create_tracked_task, percentile
 
 logger = logging.getLogger("translate_bot")
 
@@ -16,16 +31,22 @@ TRANSIENT_ERRORS = (
     asyncio.TimeoutError,
     ConnectionError,
     OSError,
+    httpx.TransportError,
+    # The OpenAI SDK clients run with max_retries=0, so their connection
+    # errors and 5xx answers are retried here instead.
+    openai.APIConnectionError,
+    openai.InternalServerError,
 )
 
 
-async def _translate_with_retry(
-    text: str, target_lang: str, engine: str, config: dict[str, Any], retries: int = 2
-) -> str:
+_T = TypeVar("_T")
+
+
+async def _with_retry(engine: str, call: Callable[[], Awaitable[_T]], retries: int = 2) -> _T:
     last_error: Exception | None = None
     for attempt in range(retries):
         try:
-            return await _translate_with_engine(text, target_lang, engine, config)
+            return await call()
         except TRANSIENT_ERRORS as e:
             last_error = e
             if attempt < retries - 1:
@@ -34,15 +55,24 @@ async def _translate_with_retry(
     raise last_error if last_error else Exception("Unknown error")
 
 
+async def _translate_with_retry(
+    text: str, target_lang: str, engine: str, config: dict[str, Any], retries: int = 2
+) -> str:
+    return await _with_retry(
+        engine, lambda: _translate_with_engine(text, target_lang, engine, config), retries
+    )
+
+
 # ---------------------------------------------------------------------------
-# Content protection: extract URLs & emojis before translation, restore after
+# Content protection: swap code, links, mentions, hashtags and emojis for
+# placeholders before translation, restore them after
 # ---------------------------------------------------------------------------
 
 _URL_PATTERN = re.compile(
     r'https?://[^\s<>\"\'\)]+|www\.[^\s<>\"\'\)]+'
 )
 
-EMOJI_PATTERN = re.compile(
+_EMOJI_CLASS = (
     "["
     "\U0001F600-\U0001F64F"  # emoticons
     "\U0001F300-\U0001F5FF"  # symbols & pictographs
@@ -63,61 +93,126 @@ EMOJI_PATTERN = re.compile(
     "\U0000303D"             # part alternation mark
     "\U00003297"             # circled ideograph congratulation
     "\U00003299"             # circled ideograph secret
-    "]+",
-    re.UNICODE,
+    "]+"
 )
 
+EMOJI_PATTERN = re.compile(_EMOJI_CLASS, re.UNICODE)
+
+# One alternation. Code comes before everything that can occur inside it, and
+# custom emoji markup and links before the @mentions, #hashtags and emojis
+# they may contain; emojis go first since they are the most frequent span
+# and no other branch starts with one. The group name is the placeholder
+# prefix. The leading lookahead lists every character a branch can start
+# with, so most positions fail on a single test.
+_PROTECT_PATTERN = re.compile(
+    "(?=[`<!hw@#" + _EMOJI_CLASS[1:-2] + "])(?:"
+    rf"(?P<EMJ>{_EMOJI_CLASS})"
+    r"|(?P<CODE>```.*?```|`[^`\n]+`)"
+    r"|(?P<CEM><emoji id=\"?\d+\"?>.*?</emoji>|!\[[^\]\n]*\]\(tg://emoji\?id=\d+\))"
+    rf"|(?P<URL>{_URL_PATTERN.pattern})"
+    r"|(?P<MNT>@(?<![\w.]@)[A-Za-z]\w{3,31})"
+    r"|(?P<TAG>#(?<![\w&]#)\w+))",
+    re.DOTALL,
+)
+
+_PLACEHOLDER_RE = re.compile(r"__(?:CODE|CEM|URL|MNT|TAG|EMJ)\d+__")
+
 
 def _protect_content(text: str) -> tuple[str, dict[str, str]]:
-    """Extract URLs and emojis, replace with placeholders to protect from translation."""
+    """Replace protected spans with placeholders in a single regex pass."""
     placeholders: dict[str, str] = {}
-    counter = 0
 
-    def _replace_url(match: re.Match) -> str:
-        nonlocal counter
-        key = f"__URL{counter}__"
+    def _replace(match: re.Match) -> str:
+        key = f"__{match.lastgroup}{len(placeholders)}__"
         placeholders[key] = match.group(0)
-        counter += 1
         return key
 
-    def _replace_emoji(match: re.Match) -> str:
-        nonlocal counter
-        key = f"__EMJ{counter}__"
-        placeholders[key] = match.group(0)
-        counter += 1
-        return key
+    return _PROTECT_PATTERN.sub(_replace, text), placeholders
+
+
+def _restore_placeholders(text: str, placeholders: dict[str, str]) -> tuple[str, list[str], list[str]]:
+    """One pass over *text*; returns (restored, missing keys, duplicated keys)."""
+    seen: dict[str, int] = {}
 
-    protected = _URL_PATTERN.sub(_replace_url, text)
-    protected = EMOJI_PATTERN.sub(_replace_emoji, protected)
-    return protected, placeholders
+    def _replace(match: re.Match) -> str:
+        key = match.group(0)
+        value = placeholders.get(key)
+        if value is None:
+            return key
+        seen[key] = seen.get(key, 0) + 1
+        return value
+
+    restored = _PLACEHOLDER_RE.sub(_replace, text)
+    missing = [key for key in placeholders if key not in seen]
+    duplicated = [key for key, count in seen.items() if count > 1]
+    return restored, missing, duplicated
 
 
 def _restore_content(text: str, placeholders: dict[str, str]) -> str:
-    """Restore protected URLs and emojis from placeholders."""
-    for key, value in placeholders.items():
-        text = text.replace(key, value)
-    return text
+    """Restore protected spans from placeholders.
+
+    A placeholder the engine repeated is restored each time; one it dropped
+    is appended at the end so links and code are never lost. Both are logged.
+    """
+    if not placeholders:
+        return text
+    restored, missing, duplicated = _restore_placeholders(text, placeholders)
+    if duplicated:
+        logger.warning("Engine output repeated placeholders: %s", ", ".join(duplicated))
+    if missing:
+        logger.warning("Engine output dropped placeholders: %s", ", ".join(missing))
+        restored = " ".join([restored.rstrip(), *(placeholders[key] for key in missing)])
+    return restored
+
+
+# The tail of a streamed chunk: a complete placeholder, or one cut off by the
+# end of the chunk, e.g. "... __UR". Only the latter is hidden.
+_PARTIAL_PLACEHOLDER_RE = re.compile(r"(?:" + _PLACEHOLDER_RE.pattern + r"|_(?:_(?:[A-Z]{1,4}\d*_?)?)?)\Z")
+
+
+def _restore_partial(text: str, placeholders: dict[str, str]) -> str:
+    """Restore a streamed prefix, hiding a trailing half-received placeholder."""
+    if not placeholders:
+        return text
+    tail = _PARTIAL_PLACEHOLDER_RE.search(text)
+    if tail is not None and not _PLACEHOLDER_RE.fullmatch(tail.group()):
+        text = text[:tail.start()]
+    return _restore_placeholders(text, placeholders)[0]
 
 
 # ---------------------------------------------------------------------------
 # Prompt
 # ---------------------------------------------------------------------------
 
-_PROMPT_TEMPLATE = (
+# Bump whenever the prompt wording changes so cached results are not reused.
+_PROMPT_VERSION = 2
+
+_PROMPT_RULES = (
     "你是一个精通多国网络文化的翻译官。\n"
     "【要求】：1. 口吻随性、接地气。 {ja_rule} 3. 俚语替换。"
     " 4. 严禁扭曲原意，必须准确传达语气。 5. 只输出纯翻译结果，无解释。"
     " 6. 严禁添加任何原文中没有的emoji表情符号。"
     " 7. 绝对不要翻译数字/日期/时间，保留原样。"
-    " 8. 所有 __URL 和 __EMJ 开头的占位符必须原样保留，不要翻译或修改。\n"
-    "【任务】：将以下文本翻译为 [{target_lang_upper}]\n{text}"
+    " 8. 所有形如 __URL0__、__CODE1__、__MNT2__ 的双下划线占位符必须原样保留，不要翻译、修改或删除。\n"
+)
+
+_PROMPT_TEMPLATE = _PROMPT_RULES + "【任务】：将以下文本翻译为 [{target_lang_upper}]\n{text}"
+
+_BATCH_PROMPT_TEMPLATE = _PROMPT_RULES + (
+    "【任务】：将以下文本分别翻译为 {langs_upper}。"
+    "只输出一个 JSON 对象，键为语言代码 {keys}，值为对应语言的译文，不要输出任何其它内容。\n{text}"
 )
 
 _JA_RULE = "2. 绝对禁止使用敬体（です/ます）！必须使用常体（だ/である/タ形）。"
+_JA_BATCH_RULE = "2. 日语译文绝对禁止使用敬体（です/ます）！必须使用常体（だ/である/タ形）。"
+
+
+def _is_japanese(target_lang: str) -> bool:
+    return target_lang.lower() in ("ja", "jp", "japanese")
 
 
 def _build_prompt(text: str, target_lang: str) -> str:
-    ja_rule = _JA_RULE if target_lang.lower() in ("ja", "jp", "japanese") else ""
+    ja_rule = _JA_RULE if _is_japanese(target_lang) else ""
     return _PROMPT_TEMPLATE.format(
         ja_rule=ja_rule,
         target_lang_upper=target_lang.upper(),
@@ -126,6 +221,16 @@ def _build_prompt(text: str, target_lang: str) -> str:
     )
 
 
+def _build_batch_prompt(text: str, target_langs: list[str]) -> str:
+    ja_rule = _JA_BATCH_RULE if any(_is_japanese(lang) for lang in target_langs) else ""
+    return _BATCH_PROMPT_TEMPLATE.format(
+        ja_rule=ja_rule,
+        langs_upper=" / ".join(f"[{lang.upper()}]" for lang in target_langs),
+        keys=", ".join(json.dumps(lang) for lang in target_langs),
+        text=text,
+    )
+
+
 # ---------------------------------------------------------------------------
 # Engine dispatch
 # ---------------------------------------------------------------------------
@@ -133,69 +238,940 @@ def _build_prompt(text: str, target_lang: str) -> str:
 _DEFAULT_TEMPERATURE = 0.8
 
 
-async def _translate_with_engine(
-    text: str, target_lang: str, engine: str, config: dict[str, Any],
-) -> str:
-    ai_prompt = _build_prompt(text, target_lang)
-    logger.info("Translating  engine=%s  target=%s", engine, target_lang)
+def _engine_model(engine: str, config: dict[str, Any]) -> str:
+    if engine == "openai":
+        return config["models"].get("openai", "gpt-4o-mini")
+    if engine == "gemini":
+        return config["models"].get("gemini", "gemini-1.5-flash")
+    if engine in config.get("custom_engines", {}):
+        return config["custom_engines"][engine]["model"]
+    return ""
 
-    if os.getenv("DEBUG"):
-        logger.info("PROMPT: %s", ai_prompt)
 
+def _is_llm_engine(engine: str, config: dict[str, Any]) -> bool:
+    return engine in ("openai", "gemini") or engine in config.get("custom_engines", {})
+
+
+def _usage_tokens(res: Any) -> int:
+    usage = getattr(res, "usage", None) or getattr(res, "usage_metadata", None)
+    return (getattr(usage, "total_tokens", None) or getattr(usage, "total_token_count", None) or 0) if usage else 0
+
+
+async def _with_key(
+    engine: str, config: dict[str, Any], call: Callable[[KeyState], Awaitable[_T]], hold: bool = False,
+) -> Any:
+    """Run *call* with a key leased from the engine's pool.
+
+    A key that gets rate limited is put in cooldown and the call moves on to
+    the next available key; KeysExhausted is raised once none is left. With
+    *hold* the lease outlives the call: (key state, result) is returned and
+    the caller releases the key through the pool.
+    """
+    pool = get_key_pool(engine, config)
+    strategy = config.get("key_pool", {}).get("strategy", "round_robin")
+    tried: set[str] = set()
+    while True:
+        state = pool.acquire(strategy, tried)
+        try:
+            result = await call(state)
+        except asyncio.CancelledError:
+            pool.release(state)
+            raise
+        except Exception as e:
+            if not pool.release(state, e):
+                raise
+            tried.add(state.key)
+            continue
+        if hold:
+            return state, result
+        pool.release(state)
+        return result
+
+
+def _chat_client(engine: str, config: dict[str, Any]) -> tuple[Callable[[str], Any], str] | None:
+    """(key -> OpenAI-compatible client, model) for a chat-completions engine."""
     if engine == "openai":
-        res = await get_openai_client(config).chat.completions.create(
-            model=config["models"].get("openai", "gpt-4o-mini"),
-            messages=[{"role": "user", "content": ai_prompt}],
+        return partial(get_openai_client, config), _engine_model("openai", config)
+    if engine in config.get("custom_engines", {}):
+        cfg = config["custom_engines"][engine]
+        return partial(get_custom_client, cfg), cfg["model"]
+    return None
+
+
+async def _complete(prompt: str, engine: str, config: dict[str, Any]) -> str:
+    """Send one prompt to an LLM engine and return the stripped completion."""
+    if os.getenv("DEBUG"):
+        logger.info("PROMPT: %s", prompt)
+
+    if engine == "gemini":
+        async def call(state: KeyState) -> str:
+            res = await get_gemini_client(config, state.key).aio.models.generate_content(
+                model=_engine_model("gemini", config),
+                contents=prompt,
+            )
+            state.tokens += _usage_tokens(res)
+            return res.text.strip()
+        return await _with_key(engine, config, call)
+
+    chat = _chat_client(engine, config)
+    if chat is None:
+        raise ValueError(f"Unknown engine: {engine!r}")
+    client_for, model = chat
+
+    async def call(state: KeyState) -> str:
+        res = await client_for(state.key).chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
             temperature=_DEFAULT_TEMPERATURE,
         )
+        state.tokens += _usage_tokens(res)
         return res.choices[0].message.content.strip()
+    return await _with_key(engine, config, call)
+
+
+async def _complete_stream(prompt: str, engine: str, config: dict[str, Any]) -> AsyncIterator[str]:
+    """Streaming counterpart of _complete; yields text deltas as they arrive.
+
+    Keys rotate only while opening the stream; the leased key is then held
+    until the stream ends.
+    """
+    if os.getenv("DEBUG"):
+        logger.info("PROMPT: %s", prompt)
 
     if engine == "gemini":
-        res = await get_gemini_client(config).aio.models.generate_content(
-            model=config["models"].get("gemini", "gemini-1.5-flash"),
-            contents=ai_prompt,
-        )
-        return res.text.strip()
+        async def open_stream(state: KeyState) -> Any:
+            return await get_gemini_client(config, state.key).aio.models.generate_content_stream(
+                model=_engine_model("gemini", config),
+                contents=prompt,
+            )
+    else:
+        chat = _chat_client(engine, config)
+        if chat is None:
+            raise ValueError(f"Engine does not support streaming: {engine!r}")
+        client_for, model = chat
+
+        async def open_stream(state: KeyState) -> Any:
+            return await client_for(state.key).chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=_DEFAULT_TEMPERATURE,
+                stream=True,
+            )
+
+    state, stream = await _with_key(engine, config, open_stream, hold=True)
+    error: Exception | None = None
+    tokens = 0
+    try:
+        async for chunk in stream:
+            if engine == "gemini":
+                # usage_metadata is cumulative; the last chunk carries the total.
+                tokens = _usage_tokens(chunk) or tokens
+                if chunk.text:
+                    yield chunk.text
+            elif chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        state.tokens += tokens
+        get_key_pool(engine, config).release(state, error)
+
+
+async def _translate_with_engine(
+    text: str, target_lang: str, engine: str, config: dict[str, Any],
+) -> str:
+    logger.info("Translating  engine=%s  target=%s", engine, target_lang)
 
     if engine == "google":
-        return await asyncio.to_thread(
-            lambda: GoogleTranslator(source="auto", target=target_lang).translate(text)
-        )
+        return (await get_google_client().translate(text, target_lang)).strip()
 
-    if engine in config.get("custom_engines", {}):
-        cfg = config["custom_engines"][engine]
-        client = get_custom_client(cfg)
-        res = await client.chat.completions.create(
-            model=cfg["model"],
-            messages=[{"role": "user", "content": ai_prompt}],
-            temperature=_DEFAULT_TEMPERATURE,
-        )
-        return res.choices[0].message.content.strip()
+    return await _complete(_build_prompt(text, target_lang), engine, config)
+
+
+# ---------------------------------------------------------------------------
+# Engine health: EWMA latency / error rate and a per-engine circuit breaker
+# ---------------------------------------------------------------------------
+
+_LATENCY_WINDOW = 50
+_EWMA_ALPHA = 0.2
+_UNKNOWN_LATENCY = 1.0
+_CENSORED_GROWTH = 1.5
+
+
+@dataclass
+class _EngineHealth:
+    ewma_latency: float | None = None
+    ewma_error: float = 0.0
+    consecutive_failures: int = 0
+    state: str = "closed"  # closed -> open -> half_open -> closed/open
+    opened_at: float = 0.0
+    cooldown: float = 0.0
+    probe_started: float = 0.0
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=_LATENCY_WINDOW))
+    # (seconds, censored) for the hedge budget; a censored sample is an
+    # attempt cancelled after that long, so its true latency is at least that.
+    hedge_samples: deque[tuple[float, bool]] = field(default_factory=lambda: deque(maxlen=_LATENCY_WINDOW))
 
-    raise ValueError(f"Unknown engine: {engine!r}")
+
+_engine_health: dict[str, _EngineHealth] = {}
+
+
+def _health(engine: str) -> _EngineHealth:
+    h = _engine_health.get(engine)
+    if h is None:
+        h = _engine_health[engine] = _EngineHealth()
+    return h
+
+
+def _record_success(engine: str, seconds: float) -> None:
+    h = _health(engine)
+    h.latencies.append(seconds)
+    h.hedge_samples.append((seconds, False))
+    h.ewma_latency = seconds if h.ewma_latency is None else (
+        _EWMA_ALPHA * seconds + (1 - _EWMA_ALPHA) * h.ewma_latency
+    )
+    h.ewma_error *= 1 - _EWMA_ALPHA
+    h.consecutive_failures = 0
+    if h.state != "closed":
+        logger.info("Circuit closed  engine=%s", engine)
+    h.state = "closed"
+    h.cooldown = 0.0
+
+
+def _record_failure(engine: str, breaker_cfg: dict[str, Any]) -> None:
+    h = _health(engine)
+    h.ewma_error = _EWMA_ALPHA + (1 - _EWMA_ALPHA) * h.ewma_error
+    h.consecutive_failures += 1
+    if h.state == "half_open":
+        h.cooldown = min(h.cooldown * 2, float(breaker_cfg.get("max_cooldown", 600)))
+    elif h.consecutive_failures >= int(breaker_cfg.get("failure_threshold", 3)):
+        h.cooldown = float(breaker_cfg.get("cooldown", 30))
+    else:
+        return
+    h.state = "open"
+    h.opened_at = time.monotonic()
+    logger.warning("Circuit open  engine=%s  cooldown=%.0fs", engine, h.cooldown)
+
+
+def _circuit_blocked(engine: str) -> bool:
+    """True while the breaker rejects traffic (open, or half-open with a probe in flight)."""
+    h = _engine_health.get(engine)
+    if h is None or h.state == "closed":
+        return False
+    now = time.monotonic()
+    if h.state == "open":
+        return now - h.opened_at < h.cooldown
+    return now - h.probe_started < h.cooldown
+
+
+def _rank_engines(engines: list[str], preferred: str) -> list[str]:
+    """Order engines by observed health; breaker-blocked ones go last.
+
+    The preferred engine keeps the first slot whenever its breaker lets
+    traffic through, so a recovered primary gets its half-open probe.
+    """
+    def score(engine: str) -> float:
+        h = _engine_health.get(engine)
+        if h is None:
+            return _UNKNOWN_LATENCY
+        latency = h.ewma_latency if h.ewma_latency is not None else _UNKNOWN_LATENCY
+        return latency * (1 + 4 * h.ewma_error)
+
+    blocked = [e for e in engines if _circuit_blocked(e)]
+    healthy = [e for e in engines if e not in blocked]
+    head = [preferred] if preferred in healthy else []
+    rest = sorted((e for e in healthy if e not in head), key=score)
+    return head + rest + blocked
+
+
+def engine_health() -> dict[str, dict[str, Any]]:
+    """Snapshot of per-engine health for status displays."""
+    return {
+        engine: {
+            "state": h.state,
+            "ewma_latency": h.ewma_latency,
+            "error_rate": h.ewma_error,
+            "consecutive_failures": h.consecutive_failures,
+            "p90": percentile(h.latencies, 90),
+        }
+        for engine, h in _engine_health.items()
+    }
+
+
+def _record_cancelled(engine: str, seconds: float) -> None:
+    """An attempt that lost a race or was abandoned: a censored latency sample."""
+    _health(engine).hedge_samples.append((seconds, True))
+
+
+def _hedge_delay(engine: str, hedge_cfg: dict[str, Any]) -> float:
+    """Seconds to wait on *engine* before firing the next one in parallel.
+
+    Uses the p90 of recent attempts, counting cancelled ones at the time
+    they were cut off. When the p90 lands on such a censored sample the real
+    value is higher, so the budget grows by _CENSORED_GROWTH (up to
+    max_delay) until the engine's completions show where it really is.
+    """
+    delay = float(hedge_cfg.get("delay", 4.0))
+    samples = _health(engine).hedge_samples
+    if hedge_cfg.get("use_p90", True) and len(samples) >= hedge_cfg.get("min_samples", 10):
+        ordered = sorted(samples)
+        seconds, censored = ordered[min(max(1, math.ceil(0.9 * len(ordered))), len(ordered)) - 1]
+        delay = min(seconds * _CENSORED_GROWTH, float(hedge_cfg.get("max_delay", 30.0))) if censored else seconds
+    return max(delay, 0.1)
+
+
+# ---------------------------------------------------------------------------
+# Admission control: bound in-flight engine calls, interactive work first
+# ---------------------------------------------------------------------------
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+_request_priority: ContextVar[int] = ContextVar("translate_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextlib.contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """Run engine calls made inside the block (and tasks it spawns) at *priority*."""
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+class _Admission:
+    """Limits concurrent engine calls globally and per engine.
+
+    Waiters are served by (priority, arrival). When a slot frees up, the
+    first waiter whose engine still has room is admitted, so one saturated
+    engine does not hold up calls to the others.
+    """
+
+    def __init__(self, global_limit: int = 8, per_engine: int = 4) -> None:
+        self.global_limit = global_limit
+        self.per_engine = per_engine
+        self.engine_limits: dict[str, int] = {}
+        self._active = 0
+        self._active_by_engine: dict[str, int] = {}
+        # [priority, seq, engine, future, enqueued_at]
+        self._waiters: list[list[Any]] = []
+        self._seq = itertools.count()
+        self._waits: deque[float] = deque(maxlen=200)
+        self.admitted = 0
+        self.queued = 0
+        self.max_wait = 0.0
+
+    def configure(self, cfg: dict[str, Any]) -> None:
+        self.global_limit = max(1, int(cfg.get("global", 8)))
+        self.per_engine = max(1, int(cfg.get("per_engine", 4)))
+        self.engine_limits = {k: max(1, int(v)) for k, v in cfg.get("engines", {}).items()}
+
+    def _has_room(self, engine: str) -> bool:
+        limit = self.engine_limits.get(engine, self.per_engine)
+        return self._active < self.global_limit and self._active_by_engine.get(engine, 0) < limit
+
+    def _take(self, engine: str, waited: float) -> None:
+        self._active += 1
+        self._active_by_engine[engine] = self._active_by_engine.get(engine, 0) + 1
+        self.admitted += 1
+        self._waits.append(waited)
+        self.max_wait = max(self.max_wait, waited)
+
+    async def acquire(self, engine: str, priority: int) -> None:
+        # Anyone still waiting is blocked on a full engine or a full global
+        # budget, so a caller whose engine has room may go straight in.
+        if self._has_room(engine):
+            self._take(engine, 0.0)
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [priority, next(self._seq), engine, future, time.monotonic()])
+        self.queued += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(engine)  # admitted just before being cancelled
+            raise
+
+    def release(self, engine: str) -> None:
+        self._active -= 1
+        self._active_by_engine[engine] -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        if not self._waiters or self._active >= self.global_limit:
+            return
+        now = time.monotonic()
+        remaining = []
+        for entry in sorted(self._waiters):
+            _, _, engine, future, enqueued_at = entry
+            if future.done():
+                continue
+            if self._has_room(engine):
+                self._take(engine, now - enqueued_at)
+                future.set_result(None)
+            else:
+                remaining.append(entry)
+        heapq.heapify(remaining)
+        self._waiters = remaining
+
+    def stats(self) -> dict[str, Any]:
+        waiting = [w for w in self._waiters if not w[3].done()]
+        return {
+            "active": self._active,
+            "limit": self.global_limit,
+            "queued": len(waiting),
+            "queued_background": sum(1 for w in waiting if w[0] >= PRIORITY_BACKGROUND),
+            "by_engine": {e: n for e, n in self._active_by_engine.items() if n},
+            "admitted": self.admitted,
+            "ever_queued": self.queued,
+            "wait_p50": percentile(self._waits, 50),
+            "wait_p95": percentile(self._waits, 95),
+            "max_wait": self.max_wait,
+        }
+
+
+_admission = _Admission()
+
+
+@contextlib.asynccontextmanager
+async def _admitted(engine: str, config: dict[str, Any]) -> AsyncIterator[None]:
+    _admission.configure(config.get("limits", {}))
+    await _admission.acquire(engine, _request_priority.get())
+    try:
+        yield
+    finally:
+        _admission.release(engine)
+
+
+def admission_stats() -> dict[str, Any]:
+    """Queue depth, in-flight calls and recent admission wait times."""
+    return _admission.stats()
+
+
+async def _translate_cached(
+    text: str, target_lang: str, engine: str, config: dict[str, Any],
+) -> str:
+    """Serve from the result cache when possible, otherwise call the engine."""
+    cache = get_translation_cache(config)
+    if cache is None:
+        return await _translate_timed(text, target_lang, engine, config)
+    key = TranslationCache.make_key(
+        text, target_lang, engine, _engine_model(engine, config), _PROMPT_VERSION
+    )
+    cached = await cache.get(key)
+    if cached is not None:
+        logger.info("Cache hit  engine=%s  target=%s", engine, target_lang)
+        return cached
+    result = await _translate_timed(text, target_lang, engine, config)
+    if result:
+        await cache.put(key, result)
+    return result
+
+
+async def _translate_timed(
+    text: str, target_lang: str, engine: str, config: dict[str, Any],
+) -> str:
+    return await _call_tracked(
+        engine, config, lambda: _translate_with_retry(text, target_lang, engine, config)
+    )
+
+
+async def _call_tracked(
+    engine: str, config: dict[str, Any], call: Callable[[], Awaitable[_T]],
+) -> _T:
+    """Run an engine call and feed the outcome into the engine's health record."""
+    h = _health(engine)
+    if h.state == "open" and time.monotonic() - h.opened_at >= h.cooldown:
+        h.state = "half_open"
+    if h.state == "half_open":
+        h.probe_started = time.monotonic()
+        logger.info("Circuit half-open, probing  engine=%s", engine)
+    start: float | None = None
+    try:
+        async with _admitted(engine, config):
+            start = time.monotonic()
+            result = await call()
+    except asyncio.CancelledError:
+        h.probe_started = 0.0
+        if start is not None:
+            _record_cancelled(engine, time.monotonic() - start)
+        raise
+    except Exception:
+        _record_failure(engine, config.get("breaker", {}))
+        raise
+    _record_success(engine, time.monotonic() - start)
+    return result
 
 
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
 
+def _engines_to_try(preferred_engine: str, config: dict[str, Any]) -> list[str]:
+    seen: set[str] = set()
+    candidates: list[str] = []
+    for e in [preferred_engine, *config.get("custom_engines", {}).keys(), "gemini", "openai", "google"]:
+        if e not in seen:
+            seen.add(e)
+            candidates.append(e)
+    ranked = _rank_engines(candidates, preferred_engine)
+    # Engines behind an open breaker are only tried when nothing else is left.
+    return [e for e in ranked if not _circuit_blocked(e)] or ranked
+
+
+# Single-flight: one upstream translation per (text, target, engine) at a time,
+# shared by the plain, streaming and multi-target entry points.
+_inflight: dict[tuple[str, str, str], asyncio.Task] = {}
+# Partial-result callbacks of everyone waiting on a streaming flight.
+_stream_listeners: dict[tuple[str, str, str], list[Callable[[str], Awaitable[None]]]] = {}
+_coalesced = 0
+
+
+def _flight_key(text: str, target_lang: str, engine: str) -> tuple[str, str, str]:
+    return text.strip(), target_lang.lower(), engine
+
+
+def _join_or_start(key: tuple[str, str, str], start: Callable[[], Awaitable[str]]) -> asyncio.Task:
+    """The in-flight task for *key*, starting it with *start* if there is none."""
+    global _coalesced
+    task = _inflight.get(key)
+    if task is not None:
+        _coalesced += 1
+        logger.info("Joined in-flight translation  target=%s", key[1])
+        return task
+    task = create_tracked_task(start())
+    _inflight[key] = task
+
+    def _done(_: asyncio.Task) -> None:
+        if _inflight.get(key) is task:
+            del _inflight[key]
+    task.add_done_callback(_done)
+    return task
+
+
 async def translate_text_with_fallback(
     text: str, target_lang: str, preferred_engine: str,
 ) -> str:
+    """Translate *text*, sharing the work with identical requests in flight.
+
+    Concurrent callers with the same text (ignoring surrounding
+    whitespace), target and engine await one task. The task is shielded, so
+    a caller that gives up does not cancel it for the others.
+    """
+    task = _join_or_start(
+        _flight_key(text, target_lang, preferred_engine),
+        lambda: _translate_text_with_fallback(text, target_lang, preferred_engine),
+    )
+    return await asyncio.shield(task)
+
+
+def inflight_stats() -> dict[str, int]:
+    return {"inflight": len(_inflight), "coalesced": _coalesced}
+
+
+async def _translate_text_with_fallback(
+    text: str, target_lang: str, preferred_engine: str, demote: str = "",
+) -> str:
+    """*demote* moves an engine that just stalled to the back of the order."""
     protected_text, placeholders = _protect_content(text)
     config = load_config()
-    seen: set[str] = set()
-    engines_to_try: list[str] = []
-    for e in [preferred_engine, *config.get("custom_engines", {}).keys(), "gemini", "openai", "google"]:
-        if e not in seen:
-            seen.add(e)
-            engines_to_try.append(e)
+    engines_to_try = _engines_to_try(preferred_engine, config)
+    if demote in engines_to_try and len(engines_to_try) > 1:
+        engines_to_try = [e for e in engines_to_try if e != demote] + [demote]
     errors: list[str] = []
-    for engine in engines_to_try:
-        try:
-            result = await _translate_with_retry(protected_text, target_lang, engine, config)
+    hedge_cfg = config.get("hedge", {})
+    if hedge_cfg.get("enabled", True) and len(engines_to_try) > 1:
+        result = await _translate_hedged(protected_text, target_lang, engines_to_try, config, errors)
+        if result is not None:
             return _restore_content(result, placeholders)
-        except Exception as ex:
-            logger.warning("Engine %s failed: %s", engine, ex)
-            errors.append(f"{engine}({str(ex)[:30]})")
+    else:
+        for engine in engines_to_try:
+            try:
+                result = await _translate_cached(protected_text, target_lang, engine, config)
+                return _restore_content(result, placeholders)
+            except Exception as ex:
+                logger.warning("Engine %s failed: %s", engine, ex)
+                errors.append(f"{engine}({str(ex)[:30]})")
     return f"ERROR: 全部节点崩溃 ({' | '.join(errors[:2])}...)"
+
+
+async def _translate_hedged(
+    text: str,
+    target_lang: str,
+    engines: list[str],
+    config: dict[str, Any],
+    errors: list[str],
+) -> str | None:
+    """Race engines in preference order, starting the next one whenever the
+    newest has not answered within its latency budget or has failed.
+
+    Returns the first successful result (losers are cancelled), or None when
+    every engine failed; failures are appended to *errors*.
+    """
+    hedge_cfg = config.get("hedge", {})
+    loop = asyncio.get_running_loop()
+    remaining = list(engines)
+    pending: dict[asyncio.Task, str] = {}
+    newest = ""
+    deadline = 0.0  # when the newest engine's latency budget runs out
+
+    def start_next() -> None:
+        nonlocal newest, deadline
+        newest = remaining.pop(0)
+        pending[asyncio.create_task(_translate_cached(text, target_lang, newest, config))] = newest
+        deadline = loop.time() + _hedge_delay(newest, hedge_cfg)
+
+    try:
+        while remaining or pending:
+            if not pending:
+                start_next()
+            budget = max(deadline - loop.time(), 0.0) if remaining else None
+            done, _ = await asyncio.wait(
+                pending, timeout=budget, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                logger.info("Hedging: %s exceeded its budget, also trying %s", newest, remaining[0])
+                start_next()
+                continue
+            winner: str | None = None
+            for task in done:
+                engine = pending.pop(task)
+                try:
+                    result = task.result()
+                except Exception as ex:
+                    logger.warning("Engine %s failed: %s", engine, ex)
+                    errors.append(f"{engine}({str(ex)[:30]})")
+                    if engine == newest:
+                        deadline = loop.time()  # no point waiting on a failed engine
+                    continue
+                if winner is None:
+                    winner = result
+            if winner is not None:
+                return winner
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def translate_text_streaming(
+    text: str,
+    target_lang: str,
+    preferred_engine: str,
+    on_partial: Callable[[str], Awaitable[None]],
+) -> str:
+    """Like translate_text_with_fallback, but streams from the best LLM engine.
+
+    *on_partial* receives the restored translation so far after every
+    delta; throttling the resulting edits is up to the caller. Identical
+    requests in flight are joined, and a streaming flight feeds its partials
+    to every caller waiting on it.
+    """
+    key = _flight_key(text, target_lang, preferred_engine)
+    if key in _inflight:
+        listeners = _stream_listeners.get(key)
+        task = _join_or_start(key, lambda: _translate_text_with_fallback(text, target_lang, preferred_engine))
+    else:
+        listeners = _stream_listeners[key] = []
+
+        async def broadcast(partial: str) -> None:
+            for callback in list(listeners):
+                try:
+                    await callback(partial)
+                except Exception as e:
+                    logger.debug("Partial callback failed: %s", e)
+
+        task = _join_or_start(
+            key, lambda: _translate_text_streaming(text, target_lang, preferred_engine, broadcast)
+        )
+        task.add_done_callback(lambda _: _stream_listeners.pop(key, None))
+    if listeners is not None:
+        listeners.append(on_partial)
+    try:
+        return await asyncio.shield(task)
+    finally:
+        if listeners is not None and on_partial in listeners:
+            listeners.remove(on_partial)
+
+
+async def _translate_text_streaming(
+    text: str,
+    target_lang: str,
+    preferred_engine: str,
+    on_partial: Callable[[str], Awaitable[None]],
+) -> str:
+    # If the stream fails (before or after the first token) the full
+    # non-streaming fallback path produces the final result. With hedging
+    # on, a stream that sends no first token within the engine's hedge
+    # budget is cancelled and the hedged path takes over, other engines
+    # first.
+    config = load_config()
+    engines = _engines_to_try(preferred_engine, config)
+    engine = engines[0]
+    if not _is_llm_engine(engine, config):
+        return await _translate_text_with_fallback(text, target_lang, preferred_engine)
+
+    protected_text, placeholders = _protect_content(text)
+    cache = get_translation_cache(config)
+    key = TranslationCache.make_key(
+        protected_text, target_lang, engine, _engine_model(engine, config), _PROMPT_VERSION
+    )
+    if cache is not None:
+        cached = await cache.get(key)
+        if cached is not None:
+            logger.info("Cache hit  engine=%s  target=%s", engine, target_lang)
+            return _restore_content(cached, placeholders)
+
+    async def consume() -> str:
+        logger.info("Translating  engine=%s  target=%s (stream)", engine, target_lang)
+        prompt = _build_prompt(protected_text, target_lang)
+        received = ""
+        async for delta in _complete_stream(prompt, engine, config):
+            first_token.set()
+            received += delta
+            await on_partial(_restore_partial(received, placeholders))
+        return received.strip()
+
+    first_token = asyncio.Event()
+    stream = asyncio.create_task(_call_tracked(engine, config, consume))
+    hedge_cfg = config.get("hedge", {})
+    try:
+        if hedge_cfg.get("enabled", True) and len(engines) > 1:
+            budget = _hedge_delay(engine, hedge_cfg)
+            first = asyncio.create_task(first_token.wait())
+            await asyncio.wait({stream, first}, timeout=budget, return_when=asyncio.FIRST_COMPLETED)
+            first.cancel()
+            if not stream.done() and not first_token.is_set():
+                logger.info("Hedging: no first token from %s within %.1fs, falling back", engine, budget)
+                stream.cancel()
+                with contextlib.suppress(asyncio.CancelledError, Exception):
+                    await stream
+                return await _translate_text_with_fallback(text, target_lang, preferred_engine, demote=engine)
+        result = await stream
+    except asyncio.CancelledError:
+        stream.cancel()
+        raise
+    except Exception as ex:
+        logger.warning("Streaming via %s failed, falling back: %s", engine, ex)
+        return await _translate_text_with_fallback(text, target_lang, preferred_engine)
+    if cache is not None and result:
+        await cache.put(key, result)
+    return _restore_content(result, placeholders)
+
+
+# ---------------------------------------------------------------------------
+# Multi-target: one LLM call for all languages, per-language fallback
+# ---------------------------------------------------------------------------
+
+_JSON_OBJECT_RE = re.compile(r"\{[\s\S]*\}")
+
+
+def _parse_batch_result(
+    raw: str, target_langs: list[str], placeholders: dict[str, str],
+) -> dict[str, str]:
+    """Extract valid per-language translations from a batch completion.
+
+    Targets that are missing, empty, not strings, or dropped a placeholder
+    are left out so the caller can retry them individually.
+    """
+    match = _JSON_OBJECT_RE.search(raw)
+    if not match:
+        return {}
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    lowered = {str(k).lower(): v for k, v in data.items()}
+    parsed: dict[str, str] = {}
+    for lang in target_langs:
+        value = data.get(lang, lowered.get(lang.lower()))
+        if not isinstance(value, str) or not value.strip():
+            continue
+        if placeholders and _restore_placeholders(value, placeholders)[1]:
+            continue
+        parsed[lang] = value.strip()
+    return parsed
+
+
+async def _translate_batch(
+    text: str,
+    target_langs: list[str],
+    engine: str,
+    config: dict[str, Any],
+    placeholders: dict[str, str],
+) -> dict[str, str]:
+    logger.info("Translating  engine=%s  targets=%s (batched)", engine, ",".join(target_langs))
+    prompt = _build_batch_prompt(text, target_langs)
+    raw = await _call_tracked(
+        engine, config, lambda: _with_retry(engine, lambda: _complete(prompt, engine, config))
+    )
+    parsed = _parse_batch_result(raw, target_langs, placeholders)
+    missing = [lang for lang in target_langs if lang not in parsed]
+    if missing:
+        logger.warning("Batch result missing/malformed for %s", ",".join(missing))
+    return parsed
+
+
+async def translate_multi_with_fallback(
+    text: str, target_langs: list[str], preferred_engine: str,
+) -> list[str]:
+    """Translate *text* into several languages, in the order given.
+
+    When the engine that would be tried first is an LLM, all cache misses go
+    out as a single structured prompt; only targets it fails to answer are
+    retried through translate_text_with_fallback. A non-LLM first choice
+    (e.g. google) keeps the per-language path rather than being overridden.
+    """
+    config = load_config()
+    batch_engine = _engines_to_try(preferred_engine, config)[0]
+    if (
+        len(target_langs) < 2
+        or not _is_llm_engine(batch_engine, config)
+        or not config.get("batch_multi_target", True)
+    ):
+        return list(await asyncio.gather(
+            *[translate_text_with_fallback(text, lang, preferred_engine) for lang in target_langs]
+        ))
+
+    langs = list(dict.fromkeys(target_langs))
+    # Targets already in flight (from any entry point) are joined as they are.
+    tasks = {
+        lang: _join_or_start(
+            _flight_key(text, lang, preferred_engine),
+            lambda lang=lang: _translate_text_with_fallback(text, lang, preferred_engine),
+        )
+        for lang in langs if _flight_key(text, lang, preferred_engine) in _inflight
+    }
+    own = [lang for lang in langs if lang not in tasks]
+
+    protected_text, placeholders = _protect_content(text)
+    translated: dict[str, str] = {}
+    cache = get_translation_cache(config)
+    model = _engine_model(batch_engine, config)
+    keys = {
+        lang: TranslationCache.make_key(protected_text, lang, batch_engine, model, _PROMPT_VERSION)
+        for lang in own
+    }
+    if cache is not None:
+        for lang in own:
+            cached = await cache.get(keys[lang])
+            if cached is not None:
+                translated[lang] = cached
+
+    misses = [lang for lang in own if lang not in translated]
+    batch: asyncio.Task | None = None
+    if len(misses) > 1:
+        async def run_batch() -> dict[str, str]:
+            try:
+                result = await _translate_batch(protected_text, misses, batch_engine, config, placeholders)
+            except Exception as ex:
+                logger.warning("Batch translation via %s failed: %s", batch_engine, ex)
+                return {}
+            if cache is not None:
+                for lang, value in result.items():
+                    await cache.put(keys[lang], value)
+            return result
+        batch = create_tracked_task(run_batch())
+
+    async def from_batch(lang: str) -> str:
+        # Targets the batch did not answer fall back one by one.
+        answered = await batch if batch is not None else {}
+        if lang in answered:
+            return _restore_content(answered[lang], placeholders)
+        return await _translate_text_with_fallback(text, lang, preferred_engine)
+
+    for lang in misses:
+        tasks[lang] = _join_or_start(
+            _flight_key(text, lang, preferred_engine), lambda lang=lang: from_batch(lang)
+        )
+    results = {lang: _restore_content(value, placeholders) for lang, value in translated.items()}
+    pending = list(tasks)
+    results.update(zip(pending, await asyncio.gather(*[asyncio.shield(tasks[lang]) for lang in pending])))
+    return [results[lang] for lang in target_langs]
+
+
+# ---------------------------------------------------------------------------
+# Long texts: split at paragraph/sentence boundaries, translate in parallel
+# ---------------------------------------------------------------------------
+
+# Boundary candidates, strongest first: blank line, line break, sentence end,
+# any whitespace. Trailing whitespace of a match becomes the separator.
+_SPLIT_PATTERNS = (
+    re.compile(r"\n[ \t]*\n\s*"),
+    re.compile(r"\n\s*"),
+    re.compile(r"[.!?…]+[\"'”’)\]]*\s+|[。！？]+[」』”’）]*\s*"),
+    re.compile(r"\s+"),
+)
+_CODE_FENCE_RE = re.compile(r"```.*?```", re.DOTALL)
+
+
+def split_text(text: str, max_chars: int) -> list[tuple[str, str]]:
+    """Split *text* into (piece, separator) pairs with pieces of at most *max_chars*.
+
+    Cuts at the strongest boundary in the second half of each window and
+    never inside a ``` code block, unless nothing else fits. Joining
+    piece + separator for every pair gives back the original text.
+    """
+    fences = [m.span() for m in _CODE_FENCE_RE.finditer(text)]
+    pairs: list[tuple[str, str]] = []
+    start = 0
+    while len(text) - start > max_chars:
+        window_end = start + max_chars
+        cut, sep_end = window_end, window_end
+        for pattern in _SPLIT_PATTERNS:
+            found = False
+            for m in pattern.finditer(text, start + max_chars // 2, window_end + 64):
+                boundary = m.start() + len(m.group(0).rstrip())
+                if boundary > window_end:
+                    break
+                if boundary > start and not any(a < boundary < b for a, b in fences):
+                    cut, sep_end, found = boundary, m.end(), True
+            if found:
+                break
+        pairs.append((text[start:cut], text[cut:sep_end]))
+        start = sep_end
+    pairs.append((text[start:], ""))
+    return pairs
+
+
+async def translate_chunked(
+    text: str,
+    target_langs: list[str],
+    preferred_engine: str,
+    max_chars: int = 1200,
+    max_parallel: int = 4,
+    on_progress: Callable[[int, int], Awaitable[None]] | None = None,
+) -> list[str]:
+    """Translate a long *text* chunk by chunk, at most *max_parallel* at once.
+
+    Results are reassembled in order with the original separators, one
+    string per target language. A language fails as a whole (its first
+    "ERROR:" result is returned) if any of its chunks fails.
+    """
+    pairs = split_text(text, max_chars)
+    semaphore = asyncio.Semaphore(max_parallel)
+    done = 0
+
+    async def _one(piece: str) -> list[str]:
+        nonlocal done
+        if not piece.strip():
+            return [piece] * len(target_langs)
+        async with semaphore:
+            result = await translate_multi_with_fallback(piece, target_langs, preferred_engine)
+        done += 1
+        if on_progress is not None:
+            await on_progress(done, len(pairs))
+        return result
+
+    per_chunk = await asyncio.gather(*[_one(piece) for piece, _ in pairs])
+    results = []
+    for i in range(len(target_langs)):
+        translated = [chunk[i] for chunk in per_chunk]
+        error = next((t for t in translated if t.startswith("ERROR:")), None)
+        results.append(error or "".join(t + sep for t, (_, sep) in zip(translated, pairs)))
+    return results
@@ -1,6 +1,7 @@
 import asyncio
 import logging
-from typing import Any
+import math
+from typing import Any, Iterable
 
 logger = logging.getLogger("translate_bot")
 
@@ -22,3 +23,12 @@ async def delete_later(message: Any, delay: int = 3) -> None:
         await message.delete()
     except Exception as e:
         logger.debug("delete_later: %s", e)
+
+
+def percentile(values: Iterable[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100); 0.0 for an empty sample."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
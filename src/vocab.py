@@ -1,67 +1,188 @@
-import copy
+import atexit
+import bisect
 import datetime
-import json
 import logging
-import os
 import random
 import time
 import uuid
+from itertools import islice
 from typing import Any
 
+from .config import load_config
+from .language import _normalise, dominant_script, script_language
+from .vocab_index import FuzzyIndex
+from .vocab_storage import VocabStorage, open_storage
+
 logger = logging.getLogger("translate_bot")
 
 VOCAB_FILE = "vocab.json"
-
-DEFAULT_VOCAB: dict[str, Any] = {
-    "words": [],
-    "stats": {
-        "total_words": 0,
-        "words_learned": 0,
-        "quiz_correct": 0,
-        "quiz_total": 0,
-        "streak_days": 0,
-        "last_study_date": "",
-        "total_reviews": 0,
-    },
+VOCAB_DB = "vocab.db"
+
+DEFAULT_STATS: dict[str, Any] = {
+    "total_words": 0,
+    "words_learned": 0,
+    "quiz_correct": 0,
+    "quiz_total": 0,
+    "streak_days": 0,
+    "last_study_date": "",
+    "total_reviews": 0,
 }
 
 # SM-2 algorithm constants
 _SM2_MIN_EASE = 1.3
 _SM2_DEFAULT_EASE = 2.5
 
-_vocab_cache: dict[str, Any] | None = None
+# In-memory state, loaded once from storage. Words are kept in insertion
+# order (oldest first) keyed by id; every change is written through to the
+# storage backend, which persists it off the event loop.
+_words: dict[int, dict[str, Any]] | None = None
+_stats: dict[str, Any] = {}
+_storage: VocabStorage | None = None
+
+# (next_review, id) for every word, kept sorted so the next due card is
+# _due_order[0] and the due count is one bisect.
+_due_order: list[tuple[float, int]] = []
+
+
+class _IdPool:
+    """Ids with O(1) add, swap-remove and uniform random pick."""
+
+    __slots__ = ("ids", "pos")
+
+    def __init__(self) -> None:
+        self.ids: list[int] = []
+        self.pos: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, word_id: int) -> None:
+        if word_id not in self.pos:
+            self.pos[word_id] = len(self.ids)
+            self.ids.append(word_id)
+
+    def remove(self, word_id: int) -> None:
+        i = self.pos.pop(word_id, None)
+        if i is None:
+            return
+        last = self.ids.pop()
+        if last != word_id:
+            self.ids[i] = last
+            self.pos[last] = i
+
+    def pick(self) -> int:
+        return self.ids[random.randrange(len(self.ids))]
+
+
+# Per-language pools: every word (distractors) and learned words (questions).
+_lang_pools: dict[str, _IdPool] = {}
+_learned_pools: dict[str, _IdPool] = {}
+# Per-language normalised/fuzzy lookup used by .write.
+_word_indexes: dict[str, FuzzyIndex] = {}
+
+
+def _get_storage() -> VocabStorage:
+    global _storage
+    if _storage is None:
+        cfg = load_config().get("vocab", {})
+        _storage = open_storage(
+            cfg.get("backend", "sqlite"), cfg.get("path", VOCAB_DB), legacy_json=VOCAB_FILE
+        )
+        atexit.register(_storage.flush)
+    return _storage
+
+
+def _ensure_loaded() -> dict[int, dict[str, Any]]:
+    global _words, _stats, _due_order
+    if _words is None:
+        words, stats = _get_storage().load()
+        _backfill_langs(words)
+        _words = {w["id"]: w for w in words}
+        _stats = {**DEFAULT_STATS, **stats}
+        _due_order = sorted((w.get("next_review", 0), w["id"]) for w in words)
+        _lang_pools.clear()
+        _learned_pools.clear()
+        _word_indexes.clear()
+        for w in words:
+            _pool_add(w)
+    return _words
+
+
+def _backfill_langs(words: list[dict[str, Any]]) -> None:
+    """Tag untagged ("auto") words whose script decides the language, and persist the tags.
+
+    Latin-script words stay "auto": one word is too little for the n-gram
+    detector, and .write and the quiz treat "auto" as matching any language.
+    """
+    untagged = [w for w in words if _lang_key(w) == "auto"]
+    if not untagged:
+        return
+    tagged = 0
+    for word in untagged:
+        lang = script_language(word["word"])
+        if lang is not None:
+            word["lang"] = _normalise(lang)
+            _save_word(word)
+            tagged += 1
+    logger.info("Tagged %d/%d untagged vocab words with a language", tagged, len(untagged))
+
+
+def _lang_key(word: dict[str, Any]) -> str:
+    """The word's language as the pools and indexes key it (zh-cn -> zh-CN, jp -> ja)."""
+    return _normalise(word.get("lang") or "auto")
+
+
+def _pool_add(word: dict[str, Any]) -> None:
+    lang = _lang_key(word)
+    _lang_pools.setdefault(lang, _IdPool()).add(word["id"])
+    _word_indexes.setdefault(lang, FuzzyIndex()).add(word["word"], word["id"])
+    if word.get("repetitions", 0) > 0:
+        _learned_pools.setdefault(lang, _IdPool()).add(word["id"])
+
+
+def _index_add(word: dict[str, Any]) -> None:
+    bisect.insort(_due_order, (word.get("next_review", 0), word["id"]))
+    _pool_add(word)
+
+
+def _index_remove(word: dict[str, Any]) -> None:
+    entry = (word.get("next_review", 0), word["id"])
+    i = bisect.bisect_left(_due_order, entry)
+    if i < len(_due_order) and _due_order[i] == entry:
+        del _due_order[i]
+    lang = _lang_key(word)
+    for pools in (_lang_pools, _learned_pools):
+        pool = pools.get(lang)
+        if pool is not None:
+            pool.remove(word["id"])
+    index = _word_indexes.get(lang)
+    if index is not None:
+        index.remove(word["word"], word["id"])
+
+
+def _save_word(word: dict[str, Any]) -> None:
+    _get_storage().upsert_word(word)
+
+
+def _save_stats() -> None:
+    _get_storage().save_stats(_stats)
 
 
 def load_vocab() -> dict[str, Any]:
-    global _vocab_cache
-    if _vocab_cache is not None:
-        return _vocab_cache
-    vocab = copy.deepcopy(DEFAULT_VOCAB)
-    if os.path.exists(VOCAB_FILE):
-        try:
-            with open(VOCAB_FILE, "r", encoding="utf-8") as f:
-                saved = json.load(f)
-            vocab.update(saved)
-        except (json.JSONDecodeError, OSError) as e:
-            logger.warning("Could not load vocab, using defaults: %s", e)
-    _vocab_cache = vocab
-    return vocab
+    """Legacy whole-deck view (newest first). O(n) — prefer the targeted helpers."""
+    words = _ensure_loaded()
+    return {"words": list(reversed(words.values())), "stats": _stats}
 
 
 def save_vocab() -> None:
-    global _vocab_cache
-    if _vocab_cache is None:
-        return
-    try:
-        with open(VOCAB_FILE, "w", encoding="utf-8") as f:
-            json.dump(_vocab_cache, f, ensure_ascii=False, indent=2)
-    except OSError as e:
-        logger.error("Failed to save vocab: %s", e)
+    """Block until pending vocab writes have reached storage."""
+    if _storage is not None:
+        _storage.flush()
 
 
 def _update_streak() -> None:
-    vocab = load_vocab()
-    stats = vocab.get("stats", {})
+    _ensure_loaded()
+    stats = _stats
     today = time.strftime("%Y-%m-%d")
     last_date = stats.get("last_study_date", "")
 
@@ -80,12 +201,10 @@ def _update_streak() -> None:
         stats["streak_days"] = 1
 
     stats["last_study_date"] = today
-    vocab["stats"] = stats
-    save_vocab()
 
 
 def add_word(word: str, translation: str, example: str = "", lang: str = "auto") -> dict[str, Any]:
-    vocab = load_vocab()
+    words = _ensure_loaded()
     _update_streak()
 
     word_id = uuid.uuid4().int >> 96  # 32-bit unique ID
@@ -94,7 +213,7 @@ def add_word(word: str, translation: str, example: str = "", lang: str = "auto")
         "word": word.strip(),
         "translation": translation.strip(),
         "example": example.strip(),
-        "lang": lang,
+        "lang": _normalise(lang),
         "created_at": time.time(),
         "next_review": time.time(),
         "interval": 1,
@@ -102,102 +221,190 @@ def add_word(word: str, translation: str, example: str = "", lang: str = "auto")
         "repetitions": 0,
     }
 
-    vocab["words"].insert(0, new_word)
-    vocab["stats"]["total_words"] = len(vocab["words"])
-    save_vocab()
+    words[word_id] = new_word
+    _index_add(new_word)
+    _stats["total_words"] = len(words)
+    _save_word(new_word)
+    _save_stats()
     return new_word
 
 
 def delete_word(word_id: int) -> bool:
-    vocab = load_vocab()
-    original_count = len(vocab["words"])
-    vocab["words"] = [w for w in vocab["words"] if w.get("id") != word_id]
+    words = _ensure_loaded()
+    word = words.pop(word_id, None)
+    if word is None:
+        return False
+    _index_remove(word)
+    _stats["total_words"] = len(words)
+    _get_storage().delete_word(word_id)
+    _save_stats()
+    return True
 
-    if len(vocab["words"]) < original_count:
-        vocab["stats"]["total_words"] = len(vocab["words"])
-        save_vocab()
-        return True
-    return False
 
+def get_word(word_id: int) -> dict[str, Any] | None:
+    return _ensure_loaded().get(word_id)
 
-def get_words(limit: int = 50, lang: str = "") -> list[dict[str, Any]]:
-    vocab = load_vocab()
-    words = vocab.get("words", [])
 
+def get_words(limit: int = 50, lang: str = "") -> list[dict[str, Any]]:
+    newest_first = reversed(_ensure_loaded().values())
     if lang:
-        words = [w for w in words if w.get("lang") == lang]
+        lang = _normalise(lang)
+        newest_first = (w for w in newest_first if _lang_key(w) == lang)
+    return list(islice(newest_first, limit))
+
+
+def count_due() -> int:
+    _ensure_loaded()
+    return bisect.bisect_right(_due_order, (time.time(), float("inf")))
+
+
+def get_due_words(limit: int | None = None) -> list[dict[str, Any]]:
+    """Due words, most overdue first."""
+    words = _ensure_loaded()
+    end = count_due()
+    if limit is not None:
+        end = min(end, limit)
+    return [words[word_id] for _, word_id in _due_order[:end]]
+
 
-    return words[:limit]
+def next_due_word() -> dict[str, Any] | None:
+    words = _ensure_loaded()
+    if _due_order and _due_order[0][0] <= time.time():
+        return words[_due_order[0][1]]
+    return None
 
 
-def get_due_words() -> list[dict[str, Any]]:
-    vocab = load_vocab()
-    now = time.time()
-    return [w for w in vocab.get("words", []) if w.get("next_review", 0) <= now]
+def count_learned() -> int:
+    _ensure_loaded()
+    return sum(len(pool) for pool in _learned_pools.values())
 
 
 def review_word(word_id: int, quality: int) -> dict[str, Any]:
-    vocab = load_vocab()
+    word = _ensure_loaded().get(word_id)
+    if word is None:
+        return {}
     _update_streak()
-
-    for word in vocab["words"]:
-        if word.get("id") == word_id:
-            if quality >= 3:
-                reps = word.get("repetitions", 0)
-                if reps == 0:
-                    word["interval"] = 1
-                elif reps == 1:
-                    word["interval"] = 6
-                else:
-                    word["interval"] = int(word.get("interval", 1) * word.get("ease_factor", _SM2_DEFAULT_EASE))
-
-                word["repetitions"] = reps + 1
-                ease = word.get("ease_factor", _SM2_DEFAULT_EASE)
-                word["ease_factor"] = max(
-                    _SM2_MIN_EASE,
-                    ease + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)),
-                )
-            else:
-                word["repetitions"] = 0
-                word["interval"] = 1
-
-            word["next_review"] = time.time() + word["interval"] * 24 * 3600
-            vocab["stats"]["total_reviews"] = vocab["stats"].get("total_reviews", 0) + 1
-            save_vocab()
-            return word
-
-    return {}
+    _index_remove(word)
+
+    if quality >= 3:
+        reps = word.get("repetitions", 0)
+        if reps == 0:
+            word["interval"] = 1
+        elif reps == 1:
+            word["interval"] = 6
+        else:
+            word["interval"] = int(word.get("interval", 1) * word.get("ease_factor", _SM2_DEFAULT_EASE))
+
+        word["repetitions"] = reps + 1
+        ease = word.get("ease_factor", _SM2_DEFAULT_EASE)
+        word["ease_factor"] = max(
+            _SM2_MIN_EASE,
+            ease + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)),
+        )
+    else:
+        word["repetitions"] = 0
+        word["interval"] = 1
+
+    word["next_review"] = time.time() + word["interval"] * 24 * 3600
+    _index_add(word)
+    _stats["total_reviews"] = _stats.get("total_reviews", 0) + 1
+    _save_word(word)
+    _save_stats()
+    return word
 
 
 def get_stats() -> dict[str, Any]:
-    vocab = load_vocab()
-    stats = vocab.get("stats", {}).copy()
-    stats["due_words"] = len(get_due_words())
-    stats["total_words"] = len(vocab.get("words", []))
+    words = _ensure_loaded()
+    stats = _stats.copy()
+    stats["due_words"] = count_due()
+    stats["total_words"] = len(words)
     return stats
 
 
-def generate_quiz(num_questions: int = 5) -> list[dict[str, Any]]:
-    vocab = load_vocab()
-    learned = [w for w in vocab.get("words", []) if w.get("repetitions", 0) > 0]
-
-    if len(learned) < 4:
+def _pick_from(pools: dict[str, _IdPool], lang: str = "") -> int | None:
+    """Uniform random id from one language's pool, or across all of them."""
+    if lang:
+        pool = pools.get(lang)
+        return pool.pick() if pool else None
+    total = sum(len(pool) for pool in pools.values())
+    if total == 0:
+        return None
+    n = random.randrange(total)
+    for pool in pools.values():
+        if n < len(pool):
+            return pool.ids[n]
+        n -= len(pool)
+    return None
+
+
+def _weakness(word: dict[str, Any]) -> float:
+    """0 for a card at (or above) the default ease, 1 at the SM-2 floor."""
+    ease = word.get("ease_factor", _SM2_DEFAULT_EASE)
+    return min(max((_SM2_DEFAULT_EASE - ease) / (_SM2_DEFAULT_EASE - _SM2_MIN_EASE), 0.0), 1.0)
+
+
+def _sample_distractors(correct: dict[str, Any], count: int = 3) -> list[dict[str, Any]]:
+    """Up to *count* options, same language first.
+
+    A short language pool is topped up from untagged ("auto") words and
+    then from any word in the same script, never from another script.
+    """
+    words = _words
+    lang = _lang_key(correct)
+    script = dominant_script(correct["word"])
+    seen_ids = {correct["id"]}
+    seen_translations = {correct["translation"]}
+    chosen: list[dict[str, Any]] = []
+    for pool_lang, same_script_only in ((lang, False), ("auto", True), ("", True)):
+        attempts = 0
+        while len(chosen) < count and attempts < 8 * count:
+            attempts += 1
+            word_id = _pick_from(_lang_pools, pool_lang)
+            if word_id is None:
+                break
+            word = words[word_id]
+            if word_id in seen_ids or word["translation"] in seen_translations:
+                continue
+            if same_script_only and dominant_script(word["word"]) != script:
+                continue
+            seen_ids.add(word_id)
+            seen_translations.add(word["translation"])
+            chosen.append(word)
+    return chosen
+
+
+def generate_quiz(num_questions: int = 5, weak_bias: float = 0.0, lang: str = "") -> list[dict[str, Any]]:
+    """Multiple-choice questions over learned words.
+
+    Questions and distractors (same language first) are drawn by rejection
+    sampling from the per-language pools, so cost is O(num_questions)
+    regardless of deck size. With *weak_bias* > 0 a card is accepted with probability
+    proportional to 1 + weak_bias * weakness (low ease factor).
+    """
+    words = _ensure_loaded()
+    lang = _normalise(lang) if lang else ""
+    learned = len(_learned_pools.get(lang, ())) if lang else count_learned()
+    if learned < 4:
         return []
 
-    candidates = list(learned)
+    target = min(num_questions, learned // 3)
+    max_weight = 1.0 + weak_bias
+    asked: set[int] = set()
     questions = []
-    for _ in range(min(num_questions, len(candidates) // 3)):
-        if not candidates:
-            break
-        correct = random.choice(candidates)
-        candidates.remove(correct)
-
-        pool = [w for w in vocab["words"] if w["id"] != correct["id"]]
-        distractor_count = min(3, len(pool))
-        if distractor_count == 0:
-            break
-        distractors = random.sample(pool, distractor_count)
-
+    attempts = 0
+    while len(questions) < target and attempts < 50 * target:
+        attempts += 1
+        word_id = _pick_from(_learned_pools, lang)
+        if word_id is None or word_id in asked:
+            continue
+        correct = words[word_id]
+        if weak_bias > 0 and random.random() * max_weight > 1.0 + weak_bias * _weakness(correct):
+            continue
+        asked.add(word_id)
+
+        distractors = _sample_distractors(correct)
+        if not distractors:
+            continue  # no other word in its language or script to offer
         options = [correct] + distractors
         random.shuffle(options)
 
@@ -211,31 +418,37 @@ def generate_quiz(num_questions: int = 5) -> list[dict[str, Any]]:
 
 
 def record_quiz_result(correct: bool) -> None:
-    vocab = load_vocab()
-    stats = vocab.get("stats", {})
-
+    _ensure_loaded()
     if correct:
-        stats["quiz_correct"] = stats.get("quiz_correct", 0) + 1
-    stats["quiz_total"] = stats.get("quiz_total", 0) + 1
+        _stats["quiz_correct"] = _stats.get("quiz_correct", 0) + 1
+    _stats["quiz_total"] = _stats.get("quiz_total", 0) + 1
+    _save_stats()
+
 
-    vocab["stats"] = stats
-    save_vocab()
+def check_writing(text: str, target_lang: str, limit: int = 5) -> dict[str, Any]:
+    """Exact and near matches for *text*, closest (then newest) first.
 
+    Words saved before language tagging (lang "auto") are searched too.
+    """
+    words = _ensure_loaded()
 
-def check_writing(text: str, target_lang: str) -> dict[str, Any]:
-    vocab = load_vocab()
-    words = vocab.get("words", [])
+    matches: list[tuple[int, int]] = []
+    for lang in {_normalise(target_lang), "auto"}:
+        index = _word_indexes.get(lang)
+        if index is not None:
+            matches.extend(index.search(text))
+    matches.sort(key=lambda m: (m[0], -words[m[1]].get("created_at", 0)))
 
     results = []
-    for word in words:
-        if target_lang == word.get("lang", ""):
-            if text.lower() == word.get("word", "").lower():
-                results.append({
-                    "word": word["word"],
-                    "translation": word["translation"],
-                    "example": word.get("example", ""),
-                    "correct": True,
-                })
+    for distance, word_id in matches[:limit]:
+        word = words[word_id]
+        results.append({
+            "word": word["word"],
+            "translation": word["translation"],
+            "example": word.get("example", ""),
+            "distance": distance,
+            "correct": distance == 0,
+        })
 
     return {
         "checked": text,
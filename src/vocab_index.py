@@ -0,0 +1,114 @@
+"""Normalised fuzzy lookup over vocabulary words.
+
+Keys are folded with NFKC, katakana→hiragana and casefolding, so ｶﾀｶﾅ,
+カタカナ and かたかな or ＡＢＣ and abc share one key. Near matches use a
+symmetric-delete index: every key is also stored under each of its
+single-character deletions, and a query probes its own deletions. That
+finds every key within one insertion, deletion, substitution or adjacent
+transposition (and many at distance two) with O(len) dict lookups,
+independent of deck size; candidates are then ranked by true edit distance.
+"""
+
+import unicodedata
+
+_KATAKANA_START = 0x30A1
+_KATAKANA_END = 0x30F6
+_KANA_SHIFT = 0x60
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = "".join(
+        chr(ord(ch) - _KANA_SHIFT) if _KATAKANA_START <= ord(ch) <= _KATAKANA_END else ch
+        for ch in text
+    )
+    return " ".join(text.split())
+
+
+def _deletes(key: str) -> set[str]:
+    return {key[:i] + key[i + 1:] for i in range(len(key))}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance; returns limit + 1 once it is exceeded."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2: list[int] = []
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cost = ca != cb
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def max_distance(key: str) -> int:
+    return 1 if len(key) <= 4 else 2
+
+
+class FuzzyIndex:
+    """Normalised key → word ids, plus deletion variants for near matches."""
+
+    __slots__ = ("_exact", "_variants")
+
+    def __init__(self) -> None:
+        self._exact: dict[str, set[int]] = {}
+        self._variants: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def add(self, text: str, word_id: int) -> None:
+        key = normalize(text)
+        ids = self._exact.get(key)
+        if ids is None:
+            ids = self._exact[key] = set()
+            for variant in _deletes(key):
+                self._variants.setdefault(variant, set()).add(key)
+        ids.add(word_id)
+
+    def remove(self, text: str, word_id: int) -> None:
+        key = normalize(text)
+        ids = self._exact.get(key)
+        if ids is None:
+            return
+        ids.discard(word_id)
+        if ids:
+            return
+        del self._exact[key]
+        for variant in _deletes(key):
+            keys = self._variants.get(variant)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._variants[variant]
+
+    def search(self, text: str) -> list[tuple[int, int]]:
+        """(distance, word_id) pairs within the key's tolerance, closest first."""
+        query = normalize(text)
+        if not query:
+            return []
+        limit = max_distance(query)
+        probes = _deletes(query)
+        candidates: set[str] = set()
+        if query in self._exact:
+            candidates.add(query)
+        candidates.update(self._variants.get(query, ()))
+        for probe in probes:
+            if probe in self._exact:
+                candidates.add(probe)
+            candidates.update(self._variants.get(probe, ()))
+
+        matches = []
+        for key in candidates:
+            distance = 0 if key == query else edit_distance(query, key, limit)
+            if distance <= limit:
+                matches.extend((distance, word_id) for word_id in self._exact[key])
+        matches.sort(key=lambda m: m[0])
+        return matches
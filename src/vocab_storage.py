@@ -0,0 +1,272 @@
+"""Pluggable persistence for the vocabulary module.
+
+Both backends apply writes on a dedicated background thread, so handlers
+running on the event loop never block on disk I/O:
+
+* SqliteStorage — one row per word (WAL mode), row-level upserts/deletes,
+  indexed on id, lang and next_review. Migrates vocab.json on first open.
+* JsonStorage   — the legacy single-file format, rewritten as a whole.
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable
+
+logger = logging.getLogger("translate_bot")
+
+_WORD_COLUMNS = (
+    "id", "word", "translation", "example", "lang",
+    "created_at", "next_review", "interval", "ease_factor", "repetitions",
+)
+
+
+class _BackgroundWriter:
+    """Runs submitted jobs on one daemon thread, draining bursts as a batch."""
+
+    def __init__(self, name: str, apply_batch: Callable[[list[Any]], None]) -> None:
+        self._queue: queue.Queue = queue.Queue()
+        self._apply_batch = apply_batch
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, job: Any) -> None:
+        self._queue.put(job)
+
+    def flush(self) -> None:
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._apply_batch(batch)
+            except Exception:
+                logger.exception("Vocab storage write failed")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+class VocabStorage(ABC):
+    """Interface shared by the storage backends."""
+
+    @abstractmethod
+    def load(self) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+        """Return (words oldest-first, stats)."""
+
+    @abstractmethod
+    def upsert_word(self, word: dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def delete_word(self, word_id: int) -> None: ...
+
+    @abstractmethod
+    def save_stats(self, stats: dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def flush(self) -> None:
+        """Block until every submitted write has been applied."""
+
+
+# ---------------------------------------------------------------------------
+# SQLite backend
+# ---------------------------------------------------------------------------
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS words (
+    id INTEGER PRIMARY KEY,
+    word TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    example TEXT NOT NULL DEFAULT '',
+    lang TEXT NOT NULL DEFAULT 'auto',
+    created_at REAL NOT NULL,
+    next_review REAL NOT NULL,
+    interval INTEGER NOT NULL DEFAULT 1,
+    ease_factor REAL NOT NULL,
+    repetitions INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_words_lang ON words(lang);
+CREATE INDEX IF NOT EXISTS idx_words_next_review ON words(next_review);
+CREATE TABLE IF NOT EXISTS stats (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_UPSERT_SQL = (
+    f"INSERT OR REPLACE INTO words ({', '.join(_WORD_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in _WORD_COLUMNS)})"
+)
+
+
+_WORD_DEFAULTS: dict[str, Any] = {
+    "example": "", "lang": "auto", "created_at": 0.0, "next_review": 0.0,
+    "interval": 1, "ease_factor": 2.5, "repetitions": 0,
+}
+
+
+def _word_row(word: dict[str, Any]) -> tuple:
+    return tuple(word.get(col, _WORD_DEFAULTS.get(col)) for col in _WORD_COLUMNS)
+
+
+class SqliteStorage(VocabStorage):
+    def __init__(self, path: str, legacy_json: str = "") -> None:
+        self.path = path
+        conn = self._connect()
+        try:
+            conn.executescript(_SCHEMA)
+            if legacy_json:
+                self._migrate_json(conn, legacy_json)
+        finally:
+            conn.close()
+        self._writer = _BackgroundWriter("vocab-sqlite-writer", self._apply_batch)
+        self._conn: sqlite3.Connection | None = None  # owned by the writer thread
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _migrate_json(self, conn: sqlite3.Connection, legacy_json: str) -> None:
+        if not os.path.exists(legacy_json):
+            return
+        if conn.execute("SELECT 1 FROM words LIMIT 1").fetchone():
+            return
+        try:
+            with open(legacy_json, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning("Vocab migration skipped, cannot read %s: %s", legacy_json, e)
+            return
+        words = saved.get("words", [])
+        with conn:
+            conn.executemany(_UPSERT_SQL, [_word_row(w) for w in words])
+            conn.executemany(
+                "INSERT OR REPLACE INTO stats (key, value) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in saved.get("stats", {}).items()],
+            )
+        os.replace(legacy_json, legacy_json + ".migrated")
+        logger.info("Migrated %d words from %s to %s", len(words), legacy_json, self.path)
+
+    def load(self) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+        conn = self._connect()
+        try:
+            conn.row_factory = sqlite3.Row
+            words = [dict(row) for row in conn.execute("SELECT * FROM words ORDER BY created_at, id")]
+            stats = {row["key"]: json.loads(row["value"]) for row in conn.execute("SELECT * FROM stats")}
+        finally:
+            conn.close()
+        return words, stats
+
+    def upsert_word(self, word: dict[str, Any]) -> None:
+        self._writer.submit((_UPSERT_SQL, _word_row(word)))
+
+    def delete_word(self, word_id: int) -> None:
+        self._writer.submit(("DELETE FROM words WHERE id = ?", (word_id,)))
+
+    def save_stats(self, stats: dict[str, Any]) -> None:
+        for key, value in stats.items():
+            self._writer.submit(
+                ("INSERT OR REPLACE INTO stats (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+            )
+
+    def flush(self) -> None:
+        self._writer.flush()
+
+    def _apply_batch(self, batch: list[tuple[str, tuple]]) -> None:
+        if self._conn is None:
+            self._conn = self._connect()
+        conn = self._conn
+        # One transaction per burst, one savepoint per row: a row that fails
+        # is rolled back and logged on its own, the rest of the burst commits.
+        with conn:
+            conn.execute("BEGIN")
+            for sql, params in batch:
+                conn.execute("SAVEPOINT row")
+                try:
+                    conn.execute(sql, params)
+                except sqlite3.Error as e:
+                    conn.execute("ROLLBACK TO row")
+                    logger.error("Vocab write skipped (%s %r): %s", sql.split()[0], params[:1], e)
+                conn.execute("RELEASE row")
+
+
+# ---------------------------------------------------------------------------
+# JSON backend (legacy format)
+# ---------------------------------------------------------------------------
+
+class JsonStorage(VocabStorage):
+    """Whole-file JSON storage; every change rewrites the file.
+
+    Bursts are coalesced on the writer thread (only the newest payload is
+    written), but serialisation is still O(deck size) per change — prefer
+    SqliteStorage for large decks.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._words: dict[int, dict[str, Any]] = {}
+        self._stats: dict[str, Any] = {}
+        self._writer = _BackgroundWriter("vocab-json-writer", self._apply_batch)
+
+    def load(self) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+        saved: dict[str, Any] = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    saved = json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                logger.warning("Could not load vocab, using defaults: %s", e)
+        # The file lists newest first.
+        words = list(reversed(saved.get("words", [])))
+        self._words = {w["id"]: dict(w) for w in words}
+        self._stats = dict(saved.get("stats", {}))
+        return words, dict(self._stats)
+
+    def upsert_word(self, word: dict[str, Any]) -> None:
+        self._words[word["id"]] = dict(word)
+        self._schedule()
+
+    def delete_word(self, word_id: int) -> None:
+        self._words.pop(word_id, None)
+        self._schedule()
+
+    def save_stats(self, stats: dict[str, Any]) -> None:
+        self._stats = dict(stats)
+        self._schedule()
+
+    def flush(self) -> None:
+        self._writer.flush()
+
+    def _schedule(self) -> None:
+        payload = json.dumps(
+            {"words": list(reversed(self._words.values())), "stats": self._stats},
+            ensure_ascii=False,
+            indent=2,
+        )
+        self._writer.submit(payload)
+
+    def _apply_batch(self, batch: list[str]) -> None:
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(batch[-1])
+        os.replace(tmp_path, self.path)
+
+
+def open_storage(backend: str, path: str, legacy_json: str) -> VocabStorage:
+    if backend == "json":
+        return JsonStorage(legacy_json)
+    if backend != "sqlite":
+        logger.warning("Unknown vocab backend %r, using sqlite", backend)
+    return SqliteStorage(path, legacy_json=legacy_json)